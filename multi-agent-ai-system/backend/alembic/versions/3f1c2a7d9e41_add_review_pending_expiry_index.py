@@ -0,0 +1,32 @@
+"""Add partial index on pending review expiry
+
+Revision ID: 3f1c2a7d9e41
+Revises: 86285786cd02
+Create Date: 2026-10-16 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c2a7d9e41'
+down_revision: Union[str, Sequence[str], None] = '86285786cd02'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_review_pending_expiry', 'review_requests', ['expires_at'], unique=False,
+        postgresql_where=sa.text("status = 'PENDING'"),
+        sqlite_where=sa.text("status = 'PENDING'")
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_review_pending_expiry', table_name='review_requests')
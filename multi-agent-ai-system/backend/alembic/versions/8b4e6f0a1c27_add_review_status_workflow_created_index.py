@@ -0,0 +1,31 @@
+"""Add composite index for pending review listing
+
+Revision ID: 8b4e6f0a1c27
+Revises: 3f1c2a7d9e41
+Create Date: 2026-10-16 10:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b4e6f0a1c27'
+down_revision: Union[str, Sequence[str], None] = '3f1c2a7d9e41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_review_status_workflow_created', 'review_requests',
+        ['status', 'workflow_id', 'created_at'], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_review_status_workflow_created', table_name='review_requests')
@@ -1,112 +1,172 @@
-from langchain_groq import ChatGroq
-from langchain_core.prompts import ChatPromptTemplate
+import asyncio
+import atexit
+import re
+import threading
+from typing import Optional
+from app.cache.llm_cache import acached_invoke
 from app.config import settings
+from app.execution.docker_runner import DockerSandbox
+from app.llm.groq_client import get_shared_chat_llm
+from app.llm.prompts import build_cached_prompt
 
-def coder_node(state: dict):
+# Static instruction blocks, kept byte-identical so the provider prefix cache
+# can serve them across calls. Per-request fields go in the human message.
+CODER_SYSTEM_PREFIX = (
+    "You are a code generation agent.\n\n"
+    "Generate clean, production-ready code that fulfills the user's request.\n\n"
+    "Include:\n"
+    "1. Complete, executable code\n"
+    "2. Clear comments explaining key sections\n"
+    "3. Installation instructions for required libraries\n"
+    "4. Usage examples\n\n"
+    "Format the code properly with syntax highlighting."
+)
+
+CODER_FIX_SYSTEM_PREFIX = (
+    "You generated code that failed to run.\n\n"
+    "Please FIX the code to resolve the error. Return ONLY the fixed code with comments."
+)
+
+CODER_PROMPT = build_cached_prompt(
+    CODER_SYSTEM_PREFIX,
+    "User Request: {input}\n"
+    "Context: {execution_data}\n"
+    "Language: {language}"
+)
+
+CODER_FIX_PROMPT = build_cached_prompt(
+    CODER_FIX_SYSTEM_PREFIX,
+    "Original Code:\n```python\n{code}\n```\n\n"
+    "Error Output:\n{error}\n\n"
+    "Approach: {strategy}"
+)
+
+# One speculative fix is requested per strategy when verification fails
+FIX_STRATEGIES = (
+    "Make the smallest change that resolves the error.",
+    "Rewrite the failing section from scratch if that is simpler.",
+    "Replace any third-party dependencies with the Python standard library.",
+)
+
+# Whole-word match, so e.g. "decode" does not count as a code request
+_CODE_KEYWORD_RE = re.compile(
+    r"\b(?:code|script|program|function|write|create|implement|build)\b",
+    re.IGNORECASE
+)
+
+# First fenced block in an LLM response, with an optional language tag
+_CODE_FENCE_RE = re.compile(r"```(?:\w+)?\n(.*?)```", re.DOTALL)
+
+# Shared across invocations so the Docker client connection is reused
+_SANDBOX: Optional[DockerSandbox] = None
+_sandbox_lock = threading.Lock()
+
+def _get_sandbox() -> DockerSandbox:
+    """Return the process-wide sandbox, creating it on first use.
+
+    A sandbox whose Docker client failed to initialize is replaced on the next
+    call, so verification resumes once the daemon becomes reachable. Creating
+    it starts the container pool, so async callers run this in a thread.
+    """
+    global _SANDBOX
+    with _sandbox_lock:
+        if _SANDBOX is None or _SANDBOX.client is None:
+            _SANDBOX = DockerSandbox(pool_size=settings.SANDBOX_POOL_SIZE)
+        return _SANDBOX
+
+def close_sandbox() -> None:
+    """Remove the process-wide sandbox's pooled containers (process shutdown)."""
+    global _SANDBOX
+    with _sandbox_lock:
+        if _SANDBOX is not None:
+            _SANDBOX.close()
+            _SANDBOX = None
+
+# Pooled containers run `sleep infinity`; don't leave them behind on exit
+atexit.register(close_sandbox)
+
+def code_requested(text: str) -> bool:
+    """True if `text` explicitly asks for code (whole-word keyword match)."""
+    return _CODE_KEYWORD_RE.search(text) is not None
+
+def _extract_code(text: str) -> str:
+    """Return the first fenced code block in `text`, or `text` unchanged."""
+    match = _CODE_FENCE_RE.search(text)
+    return match.group(1).strip() if match else text
+
+async def coder_node(state: dict):
     """
     Coder agent:
     - Writes production-ready code ONLY when explicitly requested.
     - Skips code generation for informational queries.
-    - Input keys: "input", "execution_data", and "language".
+    - Input keys: "input", "execution_data" (or "plan_data"), and "language".
     - Output: clean, well-documented code (or null if not requested).
+    
+    Runs concurrently with the executor, so execution_data is usually not
+    available yet; the plan is used as context in that case.
     """
     original_input = state.get("input", "")
-    execution_data = state.get("execution_data")
-    language = state.get("language", "python")
-    query_complexity = state.get("query_complexity", "SIMPLE")
-    
-    # Check if code was explicitly requested
-    code_keywords = ["code", "script", "program", "function", "write", "create", "implement", "build"]
-    code_requested = any(keyword in original_input.lower() for keyword in code_keywords)
     
-    # Skip code generation for simple informational queries
-    if query_complexity == "SIMPLE" and not code_requested:
-        print("Skipping code generation for SIMPLE query without code request")
-        return {"code_data": None}
-    
-    # If code wasn't explicitly requested for complex queries, also skip
-    if not code_requested:
+    # Skip code generation unless explicitly requested, whatever the complexity
+    if not code_requested(original_input):
         print("Skipping code generation - not explicitly requested")
         return {"code_data": None}
     
-    # Generate code when explicitly requested
-    llm = ChatGroq(model_name=settings.GROQ_MODEL, api_key=settings.GROQ_API_KEY)
-    
-    prompt = ChatPromptTemplate.from_template(
-        "You are a code generation agent.\n\n"
-        "User Request: {input}\n"
-        "Context: {execution_data}\n"
-        "Language: {language}\n\n"
-        "Generate clean, production-ready code that fulfills the user's request.\n\n"
-        "Include:\n"
-        "1. Complete, executable code\n"
-        "2. Clear comments explaining key sections\n"
-        "3. Installation instructions for required libraries\n"
-        "4. Usage examples\n\n"
-        "Format the code properly with syntax highlighting."
-    )
+    execution_data = state.get("execution_data") or state.get("plan_data")
+    language = state.get("language", "python")
     
-    # Initialize Sandbox
-    from app.execution.docker_runner import DockerSandbox
-    sandbox = DockerSandbox() 
+    # Generate code when explicitly requested
+    llm = get_shared_chat_llm()
     
-    # Helper to clean code
-    def extract_code(text):
-        if "```" in text:
-            # Extract content between first and last ``` block
-            import re
-            match = re.search(r"```(?:\w+)?\n(.*?)```", text, re.DOTALL)
-            if match:
-                return match.group(1).strip()
-        return text
-
-    chain = prompt | llm
+    sandbox = await asyncio.to_thread(_get_sandbox)
+
+    chain = CODER_PROMPT | llm
     content = None
     
     try:
         # 1. Generate Initial Code
-        response = chain.invoke({
+        content = await acached_invoke(chain, {
             "input": original_input,
             "execution_data": execution_data or "No additional context",
             "language": language
-        })
-        content = response.content
+        }, template_id="coder")
         
-        # 2. Verify Execution (Self-Correction Loop)
+        # 2. Verify Execution (Self-Correction)
         # Only verify if language is Python and we have code
         if language.lower() in ["python", "python3"] and content and sandbox.client:
             print("🚀 Verifying generated code in sandbox...")
-            attempts = 2
-            for attempt in range(attempts):
-                code_to_run = extract_code(content)
-                
-                result = sandbox.execute_code(language, code_to_run)
+            code_to_run = _extract_code(content)
+            
+            result = await sandbox.aexecute_code(language, code_to_run)
+            
+            if result.exit_code != 0:
+                print(f"❌ Code verification failed: {result.stderr}")
                 
-                if result.exit_code == 0:
-                    print(f"✅ Code verification successful (Attempt {attempt+1})")
-                    # Append verification note
-                    content += f"\n\n<!-- Verification: Code ran successfully in {result.duration_ms:.2f}ms -->"
-                    break
-                else:
-                    print(f"❌ Code verification failed (Attempt {attempt+1}): {result.stderr}")
-                    
-                    # Self-Correction Prompt
-                    correction_prompt = ChatPromptTemplate.from_template(
-                        "You generated code that failed to run.\n\n"
-                        "Original Code:\n```python\n{code}\n```\n\n"
-                        "Error Output:\n{error}\n\n"
-                        "Please FIX the code to resolve the error. Return ONLY the fixed code with comments."
-                    )
-                    
-                    fix_chain = correction_prompt | llm
-                    fix_response = fix_chain.invoke({
+                # Request one fix per strategy concurrently, verify all of them
+                # concurrently, and keep the first (in strategy order) that runs.
+                fix_chain = CODER_FIX_PROMPT | llm
+                candidates = await asyncio.gather(*[
+                    acached_invoke(fix_chain, {
                         "code": code_to_run,
-                        "error": result.stderr
-                    })
-                    content = fix_response.content # Update content with fixed version
-                    # Loop continues to verify the fixed code
-            if attempts > 0 and result.exit_code != 0:
-                 content += f"\n\n<!-- Warning: Code failed verification after {attempts} attempts. Error: {result.stderr[:200]}... -->"
+                        "error": result.stderr,
+                        "strategy": strategy
+                    }, template_id="coder_fix")
+                    for strategy in FIX_STRATEGIES
+                ])
+                fix_results = await asyncio.gather(*[
+                    sandbox.aexecute_code(language, _extract_code(candidate))
+                    for candidate in candidates
+                ])
+                
+                best = next((i for i, r in enumerate(fix_results) if r.exit_code == 0), 0)
+                content, result = candidates[best], fix_results[best]
+            
+            if result.exit_code == 0:
+                print("✅ Code verification successful")
+                # Append verification note
+                content += f"\n\n<!-- Verification: Code ran successfully in {result.duration_ms:.2f}ms -->"
+            else:
+                content += f"\n\n<!-- Warning: Code failed verification after {len(FIX_STRATEGIES)} fix attempts. Error: {result.stderr[:200]}... -->"
 
     except Exception as e:
         print(f"Code generation error: {e}")
@@ -0,0 +1,79 @@
+from typing import Annotated, TypedDict
+from app.cache.llm_cache import acached_structured_invoke
+from app.costs.langchain_callback import CostTrackingCallbackHandler
+from app.observability.tracing import active_agent_id
+from app.llm.groq_client import get_shared_chat_llm
+from app.llm.prompts import build_cached_prompt
+from app.llm.streaming import emit_output_delta
+from app.agents.finalizer import synthesize_complex_output
+
+class CombinedResponse(TypedDict):
+    """Internal execution notes and the final user-facing answer."""
+    execution_notes: Annotated[str, ..., "Brief internal technical note (2-3 sentences) on what the system did"]
+    final_output: Annotated[str, ..., "Complete, self-contained answer for the user, formatted in markdown"]
+
+# Covers the executor and finalizer roles in one request. Cached system prefix
+# (see app.llm.prompts.build_cached_prompt).
+COMBINED_SYSTEM_PREFIX = (
+    "You are 'Anti-Gravity', a production-grade autonomous agent.\n\n"
+    "Produce two fields in a single response.\n\n"
+    "execution_notes: a BRIEF internal technical note (2-3 sentences maximum) describing "
+    "what research/analysis was performed, what data sources were consulted, and any "
+    "synthesis that occurred. Describe what the SYSTEM did, never what the user should do "
+    "(no 'open browser', 'search Google', or manual step-by-step guides).\n\n"
+    "final_output: a complete, standalone answer for the user.\n"
+    "- Combine all relevant information into a clear, cohesive response\n"
+    "- If research was done, incorporate key findings\n"
+    "- Format appropriately (use markdown, bullets, code blocks, etc.)\n"
+    "- The user should NOT need to read the research or plan\n"
+    "- This final_output should be fully self-contained"
+)
+
+COMBINED_PROMPT = build_cached_prompt(
+    COMBINED_SYSTEM_PREFIX,
+    "User Request: {input}\n\n"
+    "Research Findings:\n{research}\n\n"
+    "Plan:\n{plan}"
+)
+
+async def combined_node(state: dict):
+    """
+    Combined executor + finalizer agent:
+    - Used for COMPLEX queries that don't ask for code, where the coder would
+      produce nothing and the executor and finalizer would each cost a round-trip.
+    - Input keys: "input", "research_data", and "plan_data".
+    - Output: execution notes and final_output from one structured-output call.
+    """
+    run_id = state.get("run_id")
+    original_input = state.get("input", "")
+    research = state.get("research_data", "")
+    plan = state.get("plan_data")
+
+    llm = get_shared_chat_llm(request_timeout=60)
+
+    callbacks = [CostTrackingCallbackHandler(agent_id=active_agent_id.get() or "combined")]
+
+    inputs = {
+        "input": original_input,
+        "research": research or "(none)",
+        "plan": str(plan) if plan else "(none)",
+    }
+
+    try:
+        chain = COMBINED_PROMPT | llm.with_structured_output(CombinedResponse)
+        response = await acached_structured_invoke(chain, inputs, "combined", config={"callbacks": callbacks})
+        execution_notes = response.get("execution_notes")
+        final_output = response.get("final_output", "")
+        emit_output_delta(run_id, "Combined", final_output)
+    except Exception as e:
+        print(f"Combined generation error: {e}")
+        # Fall back to the finalizer's plain synthesis
+        execution_notes = None
+        final_output = await synthesize_complex_output(
+            original_input, research, plan, None, None, llm, run_id
+        )
+
+    if not final_output or final_output.strip() == "":
+        final_output = f"I apologize, but I encountered an issue processing your request: '{original_input}'. Please try rephrasing your question or provide more details."
+
+    return {"execution_data": execution_notes, "code_data": None, "final_output": final_output}
@@ -1,14 +1,17 @@
+from functools import partial
 from typing import TypedDict, List, Annotated, Any
 from langchain_core.messages import BaseMessage
 from langgraph.graph import StateGraph, END
 from langgraph.graph.message import add_messages
 
 from app.agents.researcher import research_node
+from app.agents.coder import code_requested
 from app.agents.traced_agents import (
     traced_planner_node as planner_node,
     traced_executor_node as executor_node,
     traced_coder_node as coder_node,
     traced_finalizer_node as finalizer_node,
+    traced_combined_node as combined_node,
 )
 
 class AgentState(TypedDict):
@@ -45,10 +48,24 @@ def should_continue_after_research(state: AgentState):
     print("DEBUG: routing to planner (complexity=COMPLEX)")
     return "planner"
 
-def should_continue_after_plan(state: AgentState):
+# Nodes the combined node and the fan-out cover; an approval gate on either
+# disables both, so each gated node pauses the run on its own
+FUSED_NODES = ("executor", "coder")
+
+def should_continue_after_plan(state: AgentState, gated: bool = False):
     if state.get("mode") == "plan_only":
         return "finalizer"
-    return "executor"
+    # Gated runs keep executor -> coder sequential: a fan-out would pause once
+    # for both nodes, and a single approval would then run them both.
+    if gated:
+        return "executor"
+    # Without a code request the coder is a no-op, so executor notes and the
+    # final answer can come from a single structured-output call.
+    if not code_requested(state.get("input", "")):
+        return "combined"
+    # Executor notes and code generation only depend on the plan,
+    # so fan out and run them concurrently.
+    return ["executor", "coder"]
 
 from app.agents.ocr import create_ocr_graph
 
@@ -68,6 +85,7 @@ def create_graph(config: dict = None, workflow_name: str = "default", checkpoint
     workflow.add_node("executor", executor_node)
     workflow.add_node("coder", coder_node)
     workflow.add_node("finalizer", finalizer_node)
+    workflow.add_node("combined", combined_node)
     
     workflow.set_entry_point("researcher")
     
@@ -80,18 +98,28 @@ def create_graph(config: dict = None, workflow_name: str = "default", checkpoint
         }
     )
     
+    # Never route around a human approval gate
+    gated = bool(set(interrupt_before or ()) & set(FUSED_NODES))
+    
     workflow.add_conditional_edges(
         "planner",
-        should_continue_after_plan,
+        partial(should_continue_after_plan, gated=gated),
         {
             "finalizer": "finalizer",
-            "executor": "executor"
+            "executor": "executor",
+            "coder": "coder",
+            "combined": "combined"
         }
     )
     
-    workflow.add_edge("executor", "coder")
-    workflow.add_edge("coder", "finalizer")  # Always go to finalizer
+    if gated:
+        workflow.add_edge("executor", "coder")
+        workflow.add_edge("coder", "finalizer")
+    else:
+        # Join: finalizer waits for both parallel branches
+        workflow.add_edge(["executor", "coder"], "finalizer")
     workflow.add_edge("finalizer", END)  # Finalizer is the last step before END
+    workflow.add_edge("combined", END)
     
     return workflow.compile(checkpointer=checkpointer, interrupt_before=interrupt_before)
 
@@ -1,9 +1,10 @@
 from typing import TypedDict, Optional
 from langgraph.graph import StateGraph, END
 from app.llm.groq_client import call_groq_sync
-import json
+import orjson
 import os
-import pdfplumber
+import re
+import pypdfium2 as pdfium
 
 class OCRState(TypedDict):
     document_text: Optional[str]
@@ -13,9 +14,59 @@ class OCRState(TypedDict):
     final_output: Optional[str]
     workflow_id: Optional[str]
 
+# Headers and totals live at the start and end of an invoice, so only this
+# many pages from each end are decoded, and text input is capped.
+OCR_EDGE_PAGES = 2
+OCR_MAX_TEXT_CHARS = 64 * 1024
+
+# Markdown code fences (with an optional json tag) the LLM may wrap output in
+_MD_FENCE_RE = re.compile(r"```(?:json)?\s*")
+
+# Common "Invoice #: ABC-123" / "Total: $1,234.56" layouts. The invoice number
+# must contain a digit so labels like "Invoice Date" are not captured.
+_INVOICE_RE = re.compile(r"\binvoice\s*(?:no\.?|number)?\s*[#:]?\s*#?\s*([A-Z0-9-]*\d[A-Z0-9-]*)\b", re.IGNORECASE)
+_TOTAL_RE = re.compile(r"\btotal\s*(?:due|amount)?\s*:?\s*\$?\s*([\d,]+\.\d{2})\b", re.IGNORECASE)
+
+def _match_invoice_fields(text: str) -> Optional[dict]:
+    """
+    Pull invoice number and total straight from the text when both follow a
+    standard layout. The last total wins, since grand totals follow subtotals.
+    Returns None if either field is missing.
+    """
+    invoice = _INVOICE_RE.search(text)
+    totals = _TOTAL_RE.findall(text)
+    if not invoice or not totals:
+        return None
+    return {"invoice_number": invoice.group(1), "total": totals[-1]}
+
+def _extract_pdf_pages(file_path: str, edge_pages: int = OCR_EDGE_PAGES) -> list:
+    """
+    Return the text of the first and last `edge_pages` PDF pages (all pages
+    for short documents), using PDFium's native text layer. Pages in between
+    are never decoded.
+    """
+    pdf = pdfium.PdfDocument(file_path)
+    try:
+        count = len(pdf)
+        if count > 2 * edge_pages:
+            indices = [*range(edge_pages), *range(count - edge_pages, count)]
+        else:
+            indices = range(count)
+        pages = [""] * len(indices)
+        for i, index in enumerate(indices):
+            page = pdf[index]
+            textpage = page.get_textpage()
+            pages[i] = textpage.get_text_range() or ""
+            textpage.close()
+            page.close()
+        return pages
+    finally:
+        pdf.close()
+
 def extract_node(state: OCRState):
     """
-    Extracts invoice details from the document text or file using LLM.
+    Extracts invoice details from the document text or file, using the LLM
+    only when the fields can't be matched directly.
     """
     text = state.get("document_text", "")
     file_path = state.get("file_path")
@@ -25,25 +76,35 @@ def extract_node(state: OCRState):
         try:
             filename, ext = os.path.splitext(file_path)
             if ext.lower() == ".pdf":
-                with pdfplumber.open(file_path) as pdf:
-                    extracted_pages = []
-                    for page in pdf.pages:
-                        extracted_pages.append(page.extract_text() or "")
-                    text = "\n".join(extracted_pages)
+                extracted_pages = _extract_pdf_pages(file_path)
+                text = "\n".join(extracted_pages)
             else:
                 # Assume text file or try to read as text
                 with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-                    text = f.read()
+                    text = f.read(OCR_MAX_TEXT_CHARS)
         except Exception as e:
             return {
-                "final_output": json.dumps({"error": f"Failed to read file: {str(e)}"})
+                "final_output": orjson.dumps({"error": f"Failed to read file: {str(e)}"}).decode()
             }
     
     if not text:
         return {
-             "final_output": json.dumps({"error": "No text provided or extracted from file."})
+             "final_output": orjson.dumps({"error": "No text provided or extracted from file."}).decode()
         }
     
+    # Standard layouts don't need the LLM
+    data = _match_invoice_fields(text)
+    if data:
+        return {
+            "document_text": text,
+            "invoice_number": data["invoice_number"],
+            "total": data["total"],
+            "final_output": orjson.dumps(data).decode()
+        }
+    
+    # Inline document text is not capped by the file readers above
+    text = text[:OCR_MAX_TEXT_CHARS]
+    
     prompt = f"""
     You are an expert Invoice OCR system. Extract the 'invoice_number' and 'total' from the following text.
     Return ONLY a JSON object with these two keys. Do not include any markdown formatting or explanation.
@@ -58,8 +119,8 @@ def extract_node(state: OCRState):
     try:
         response = call_groq_sync(prompt, temperature=0.0)
         # clean any markdown formatting if present
-        cleaned_response = response.replace("```json", "").replace("```", "").strip()
-        data = json.loads(cleaned_response)
+        cleaned_response = _MD_FENCE_RE.sub("", response).strip()
+        data = orjson.loads(cleaned_response)
         
         return {
             "document_text": text, # Update state with extracted text
@@ -70,7 +131,7 @@ def extract_node(state: OCRState):
     except Exception as e:
         print(f"OCR Extraction Failed: {e}")
         return {
-            "final_output": json.dumps({"error": str(e)})
+            "final_output": orjson.dumps({"error": str(e)}).decode()
         }
 
 def create_ocr_graph(checkpointer=None, interrupt_before=None):
@@ -1,9 +1,40 @@
-from langchain_groq import ChatGroq
+from typing import List
+from pydantic import BaseModel
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import JsonOutputParser
-from app.config import settings
+from app.cache.llm_cache import acached_structured_invoke
+from app.costs.langchain_callback import CostTrackingCallbackHandler
+from app.observability.tracing import active_agent_id
+from app.llm.groq_client import get_shared_chat_llm
 
-def planner_node(state: dict):
+PLANNER_PROMPT = ChatPromptTemplate.from_template(
+    "You are a planner agent for an autonomous AI research system.\n\n"
+    "Task: {task}\n"
+    "Research Findings: {research_data}\n\n"
+    "Based on the research findings, create a concise high-level action plan.\n\n"
+    "IMPORTANT:\n"
+    "- This plan describes what the SYSTEM did/will do internally, NOT what the user should do\n"
+    "- Focus on the research and synthesis process\n"
+    "- Keep it brief and high-level (3-5 steps maximum)\n"
+    "- Do NOT include manual user instructions\n"
+    "- Do NOT tell users to 'open browser', 'search Google', etc."
+)
+
+# Prefixes of the error strings upstream agents put in research_data; a plan
+# built from these would be noise, so planning is skipped.
+RESEARCH_ERROR_PREFIXES = ("Search failed", "Research summary failed", "Failed to initialize LLM")
+
+class PlanStep(BaseModel):
+    id: int
+    description: str
+    estimated_time: str
+    dependencies: List[int]
+    complexity: str
+
+class Plan(BaseModel):
+    """High-level steps the system takes to fulfil the task."""
+    steps: List[PlanStep]
+
+async def planner_node(state: dict):
     """
     Planner agent:
     - Breaks complex tasks into clear, actionable steps.
@@ -19,36 +50,21 @@ def planner_node(state: dict):
     if query_complexity == "SIMPLE":
         print("Skipping planning for SIMPLE query")
         return {"plan_data": None}
+
+    if not research_data or (isinstance(research_data, str) and research_data.startswith(RESEARCH_ERROR_PREFIXES)):
+        print("Skipping planning: no usable research data")
+        return {"plan_data": None}
     
     # For complex queries, generate a concise high-level plan
-    llm = ChatGroq(model_name=settings.GROQ_MODEL, api_key=settings.GROQ_API_KEY)
-    
-    prompt = ChatPromptTemplate.from_template(
-        "You are a planner agent for an autonomous AI research system.\n\n"
-        "Task: {task}\n"
-        "Research Findings: {research_data}\n\n"
-        "Based on the research findings, create a concise high-level action plan.\n\n"
-        "IMPORTANT:\n"
-        "- This plan describes what the SYSTEM did/will do internally, NOT what the user should do\n"
-        "- Focus on the research and synthesis process\n"
-        "- Keep it brief and high-level (3-5 steps maximum)\n"
-        "- Do NOT include manual user instructions\n"
-        "- Do NOT tell users to 'open browser', 'search Google', etc.\n\n"
-        "Return a JSON object with a 'steps' key containing the high-level steps.\n"
-        "Each step should have 'id', 'description', 'estimated_time', 'dependencies', and 'complexity'.\n"
-        "Ensure the output is valid JSON."
-    )
+    llm = get_shared_chat_llm()
     
     # Setup cost tracking
-    from app.costs.langchain_callback import CostTrackingCallbackHandler
-    workflow_id = state.get("active_workflow_id")
-    agent_id = state.get("active_agent_id", "planner")
-    
-    callbacks = [CostTrackingCallbackHandler(workflow_id=workflow_id, agent_id=agent_id)]
+    callbacks = [CostTrackingCallbackHandler(agent_id=active_agent_id.get() or "planner")]
     
-    chain = prompt | llm | JsonOutputParser()
+    # Function calling constrains the reply to the Plan schema
+    chain = PLANNER_PROMPT | llm.with_structured_output(Plan)
     try:
-        response = chain.invoke({"task": task, "research_data": research_data}, config={"callbacks": callbacks})
+        response = await acached_structured_invoke(chain, {"task": task, "research_data": research_data}, "planner_plan", config={"callbacks": callbacks})
     except Exception as e:
         print(f"Planning error: {e}")
         response = None
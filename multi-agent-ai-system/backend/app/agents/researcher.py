@@ -1,9 +1,15 @@
-from langchain_groq import ChatGroq
-from langchain_core.prompts import ChatPromptTemplate
+import asyncio
+import re
+from concurrent.futures import ThreadPoolExecutor
 from duckduckgo_search import DDGS
 import os
+import threading
 import time
+from app.cache.semantic_cache import SemanticCache
 from app.config import settings
+from app.llm.groq_client import get_shared_chat_llm
+from app.llm.prompts import build_cached_prompt
+from app.llm.streaming import stream_completion
 from app.observability.tracing import get_tracer, trace_span, add_span_attributes
 from app.observability.events import emit_workflow_event, EventType
 
@@ -11,6 +17,100 @@ tracer = get_tracer("agent.researcher")
 import logging
 logger = logging.getLogger(__name__)
 
+# Keywords that mark a query as COMPLEX. Matched at the start of a word, so
+# "findings" still counts for "find" but "decode" no longer counts for "code".
+COMPLEXITY_KEYWORDS = (
+    'find', 'list', 'companies', 'emails', 'current', 'latest',
+    'price', 'stock', 'news', 'compare', 'analysis', 'statistics',
+    'data', 'research', 'investigate', 'multiple', 'several',
+    'create', 'game', 'code', 'script', 'generate', 'write', 'implement'
+)
+_COMPLEXITY_RE = re.compile(r"\b(?:" + "|".join(map(re.escape, COMPLEXITY_KEYWORDS)) + ")", re.IGNORECASE)
+
+# duckduckgo_search has no async client, so searches run on their own small
+# pool rather than the loop's default executor shared with other blocking work.
+SEARCH_MAX_WORKERS = 8
+_search_executor = ThreadPoolExecutor(max_workers=SEARCH_MAX_WORKERS, thread_name_prefix="ddgs")
+
+# One DDGS per search thread, so its HTTP session (and open connections to
+# duckduckgo.com) survives across searches without being shared between threads
+_ddgs_local = threading.local()
+
+def _search_web(query: str, max_results: int = 5):
+    ddgs = getattr(_ddgs_local, "ddgs", None)
+    if ddgs is None:
+        ddgs = _ddgs_local.ddgs = DDGS()
+    return ddgs.text(query, max_results=max_results)
+
+# Longer inputs are truncated before search and synthesis to cap token cost
+MAX_QUERY_CHARS = 10_000
+
+# Near-duplicate questions reuse an earlier search + synthesis
+research_cache = SemanticCache("research")
+
+# Static instruction blocks go in the cached system prefix (see
+# app.llm.prompts.build_cached_prompt); the query and results come last.
+RESEARCH_FALLBACK_SYSTEM_PREFIX = (
+    "You are 'Anti-Gravity', a production-grade autonomous researcher.\n\n"
+    "IMPORTANT: Web search failed or returned no results.\n"
+    "Use your internal knowledge to provide the best possible answer.\n\n"
+    "Rules:\n"
+    "- Provide a direct, helpful answer based on your training data\n"
+    "- If you don't have current/specific data, acknowledge this briefly but still provide useful general information\n"
+    "- Format appropriately (markdown, bullets, numbered lists, etc.)\n"
+    "- NEVER say 'I cannot help' or leave the answer empty\n"
+    "- For recipes/how-tos: provide complete instructions\n"
+    "- For definitions: provide clear explanations\n"
+    "- For comparisons: use tables or structured lists"
+)
+
+# Complex queries: show the research process
+RESEARCH_COMPLEX_SYSTEM_PREFIX = (
+    "You are 'Anti-Gravity', a production-grade autonomous researcher.\n\n"
+    "This is a COMPLEX query requiring detailed research.\n\n"
+    "Provide your response in this format:\n"
+    "## Research Summary\n"
+    "[Concise overview of findings]\n\n"
+    "## Key Findings\n"
+    "[Detailed information organized by topic]\n\n"
+    "## Sources\n"
+    "[List of sources used]\n\n"
+    "CRITICAL: Filter out any irrelevant information. Only include findings that directly address the user's request.\n"
+    "If the user asked for specific data extraction, prioritize that in Key Findings."
+)
+
+# Simple queries: direct answer without visible research sections
+RESEARCH_SIMPLE_SYSTEM_PREFIX = (
+    "You are 'Anti-Gravity', a production-grade autonomous researcher.\n\n"
+    "This is a SIMPLE informational query.\n\n"
+    "CRITICAL: Provide a direct, clear answer WITHOUT any research metadata.\n"
+    "- Do NOT include sections like 'Research Summary' or 'Sources'\n"
+    "- Do NOT mention search queries or research process\n"
+    "- Just provide the answer in the most natural, helpful format\n"
+    "- Use appropriate formatting (bullets, numbered lists, etc.) based on the question type\n"
+    "- Filter out any irrelevant information from search results\n\n"
+    "Examples:\n"
+    "- Recipe request → Ingredients + Steps\n"
+    "- Definition → Clear explanation\n"
+    "- How-to → Step-by-step instructions\n"
+    "- Comparison → Table or bullet comparison"
+)
+
+RESEARCH_FALLBACK_PROMPT = build_cached_prompt(
+    RESEARCH_FALLBACK_SYSTEM_PREFIX,
+    "User Query: {query}\n\n"
+    "Provide your complete answer now:"
+)
+
+SEARCH_RESULTS_TEMPLATE = (
+    "Original Request: {original_input}\n"
+    "Search Results: {results}"
+)
+
+RESEARCH_COMPLEX_PROMPT = build_cached_prompt(RESEARCH_COMPLEX_SYSTEM_PREFIX, SEARCH_RESULTS_TEMPLATE)
+
+RESEARCH_SIMPLE_PROMPT = build_cached_prompt(RESEARCH_SIMPLE_SYSTEM_PREFIX, SEARCH_RESULTS_TEMPLATE)
+
 async def research_node(state: dict):
     """
     Optimized Researcher agent:
@@ -20,6 +120,12 @@ async def research_node(state: dict):
     - Uses simple heuristics for complexity detection instead of LLM calls.
     """
     original_input = state.get("input")
+    if not original_input or not original_input.strip():
+        return {
+            "research_data": "Please provide a non-empty query.",
+            "query_complexity": "SIMPLE"
+        }
+    original_input = original_input[:MAX_QUERY_CHARS]
     run_id = state.get("run_id", "unknown_run")
     
     # Emit agent started event
@@ -41,11 +147,22 @@ async def research_node(state: dict):
             "agent.name": "Researcher",
         }
     ) as agent_span:
+        cached = await asyncio.to_thread(research_cache.lookup, original_input)
+        if cached is not None:
+            logger.info(f"Semantic cache hit for research (run_id={run_id})")
+            add_span_attributes(agent_span, {"agent.cache_hit": True})
+            emit_workflow_event(
+                run_id=run_id,
+                event_type=EventType.WORKFLOW_AGENT_COMPLETED,
+                agent_name="Researcher",
+                progress=20,
+                payload={"agent_id": "researcher", "success": True}
+            )
+            return cached
+        
         # Initialize LLM
         try:
-            logger.info(f"Initializing ChatGroq (run_id={run_id})...")
-            llm = ChatGroq(model_name=settings.GROQ_MODEL, api_key=settings.GROQ_API_KEY, request_timeout=60)
-            logger.info("ChatGroq initialized.")
+            llm = get_shared_chat_llm(request_timeout=60)
         except Exception as e:
             return {
                 "research_data": f"Failed to initialize LLM: {str(e)}",
@@ -53,20 +170,8 @@ async def research_node(state: dict):
             }
 
         # 1. Simple Heuristic-Based Complexity Assessment (NO LLM CALL)
-        # Check for keywords that indicate complexity
-        complexity_keywords = [
-            'find', 'list', 'companies', 'emails', 'current', 'latest', 
-            'price', 'stock', 'news', 'compare', 'analysis', 'statistics',
-            'data', 'research', 'investigate', 'multiple', 'several',
-            'create', 'game', 'code', 'script', 'generate', 'write', 'implement'
-        ]
-        
-        input_lower = original_input.lower()
-        is_complex = any(keyword in input_lower for keyword in complexity_keywords)
-        
-        # Also check query length - longer queries tend to be more complex
-        if len(original_input.split()) > 10:
-            is_complex = True
+        # Keywords that indicate complexity, or a long query (those tend to be complex)
+        is_complex = bool(_COMPLEXITY_RE.search(original_input)) or len(original_input.split()) > 10
         
         print(f"Query complexity (heuristic): {'COMPLEX' if is_complex else 'SIMPLE'}")
         add_span_attributes(agent_span, {"agent.query_complexity": "COMPLEX" if is_complex else "SIMPLE"})
@@ -76,21 +181,20 @@ async def research_node(state: dict):
         all_search_results = ""
         search_successful = False
         try:
-            import asyncio
-            loop = asyncio.get_event_loop()
-            ddgs = DDGS()
+            loop = asyncio.get_running_loop()
             # Single search with more results (5 instead of 3x3=9)
             logger.info(f"Starting DuckDuckGo search for: {original_input}...")
-            # Use run_in_executor for the blocking search call
-            results = await loop.run_in_executor(None, lambda: ddgs.text(original_input, max_results=5))
+            results = await loop.run_in_executor(_search_executor, _search_web, original_input)
             logger.info(f"DuckDuckGo search completed. Results found: {bool(results)}")
             
             if results:
                 search_successful = True
-                for i, result in enumerate(results, 1):
-                    all_search_results += f"\n{i}. {result.get('title', 'No title')}\n"
-                    all_search_results += f"   {result.get('body', 'No description')}\n"
-                    all_search_results += f"   URL: {result.get('href', 'No URL')}\n"
+                all_search_results = "".join(
+                    f"\n{i}. {result.get('title', 'No title')}\n"
+                    f"   {result.get('body', 'No description')}\n"
+                    f"   URL: {result.get('href', 'No URL')}\n"
+                    for i, result in enumerate(results, 1)
+                )
             else:
                 all_search_results = "No search results found."
                 
@@ -104,22 +208,7 @@ async def research_node(state: dict):
             if not search_successful or not all_search_results.strip():
                 # Fallback to internal knowledge
                 print("Falling back to internal knowledge")
-                fallback_prompt = ChatPromptTemplate.from_template(
-                    "You are 'Anti-Gravity', a production-grade autonomous researcher.\n\n"
-                    "User Query: {query}\n\n"
-                    "IMPORTANT: Web search failed or returned no results.\n"
-                    "Use your internal knowledge to provide the best possible answer.\n\n"
-                    "Rules:\n"
-                    "- Provide a direct, helpful answer based on your training data\n"
-                    "- If you don't have current/specific data, acknowledge this briefly but still provide useful general information\n"
-                    "- Format appropriately (markdown, bullets, numbered lists, etc.)\n"
-                    "- NEVER say 'I cannot help' or leave the answer empty\n"
-                    "- For recipes/how-tos: provide complete instructions\n"
-                    "- For definitions: provide clear explanations\n"
-                    "- For comparisons: use tables or structured lists\n\n"
-                    "Provide your complete answer now:"
-                )
-                chain = fallback_prompt | llm
+                chain = RESEARCH_FALLBACK_PROMPT | llm
                 
                 # Create llm.call span for fallback
                 llm_start = time.time()
@@ -133,51 +222,16 @@ async def research_node(state: dict):
                     }
                 ) as llm_span:
                     logger.info("Invoking LLM for fallback synthesis...")
-                    response = chain.invoke({"query": original_input})
+                    content = await stream_completion(chain, {"query": original_input}, run_id, "Researcher", "research_fallback")
                     logger.info("LLM fallback synthesis completed.")
                     llm_latency = (time.time() - llm_start) * 1000
                     add_span_attributes(llm_span, {"llm.latency_ms": llm_latency})
-                    content = response.content
             
             else:
                 # Use search results - single prompt for both simple and complex
-                if is_complex:
-                    # Complex queries: Show research process
-                    prompt = ChatPromptTemplate.from_template(
-                        "You are 'Anti-Gravity', a production-grade autonomous researcher.\n\n"
-                        "Original Request: {original_input}\n"
-                        "Search Results: {results}\n\n"
-                        "This is a COMPLEX query requiring detailed research.\n\n"
-                        "Provide your response in this format:\n"
-                        "## Research Summary\n"
-                        "[Concise overview of findings]\n\n"
-                        "## Key Findings\n"
-                        "[Detailed information organized by topic]\n\n"
-                        "## Sources\n"
-                        "[List of sources used]\n\n"
-                        "CRITICAL: Filter out any irrelevant information. Only include findings that directly address the user's request.\n"
-                        "If the user asked for specific data extraction, prioritize that in Key Findings."
-                    )
-                else:
-                    # Simple queries: Direct answer without visible research sections
-                    prompt = ChatPromptTemplate.from_template(
-                        "You are 'Anti-Gravity', a production-grade autonomous researcher.\n\n"
-                        "Original Request: {original_input}\n"
-                        "Search Results: {results}\n\n"
-                        "This is a SIMPLE informational query.\n\n"
-                        "CRITICAL: Provide a direct, clear answer WITHOUT any research metadata.\n"
-                        "- Do NOT include sections like 'Research Summary' or 'Sources'\n"
-                        "- Do NOT mention search queries or research process\n"
-                        "- Just provide the answer in the most natural, helpful format\n"
-                        "- Use appropriate formatting (bullets, numbered lists, etc.) based on the question type\n"
-                        "- Filter out any irrelevant information from search results\n\n"
-                        "Examples:\n"
-                        "- Recipe request → Ingredients + Steps\n"
-                        "- Definition → Clear explanation\n"
-                        "- How-to → Step-by-step instructions\n"
-                        "- Comparison → Table or bullet comparison"
-                    )
-                
+                prompt = RESEARCH_COMPLEX_PROMPT if is_complex else RESEARCH_SIMPLE_PROMPT
+                # Separate template ids keep COMPLEX and SIMPLE answers apart in the cache
+                template_id = "research_complex" if is_complex else "research_simple"
                 chain = prompt | llm
                 
                 # Create llm.call span for synthesis
@@ -192,14 +246,13 @@ async def research_node(state: dict):
                     }
                 ) as llm_span:
                     logger.info("Invoking LLM for research synthesis...")
-                    response = chain.invoke({
+                    content = await stream_completion(chain, {
                         "original_input": original_input,
                         "results": all_search_results
-                    })
+                    }, run_id, "Researcher", template_id)
                     logger.info("LLM research synthesis completed.")
                     llm_latency = (time.time() - llm_start) * 1000
                     add_span_attributes(llm_span, {"llm.latency_ms": llm_latency})
-                    content = response.content
                 
         except Exception as e:
             print(f"LLM error: {e}")
@@ -214,8 +267,11 @@ async def research_node(state: dict):
             payload={"agent_id": "researcher", "success": True}
         )
         
-        return {
+        result = {
             "research_data": content,
             "query_complexity": "COMPLEX" if is_complex else "SIMPLE"
         }
+        if search_successful:
+            await asyncio.to_thread(research_cache.store, original_input, result)
+        return result
 
@@ -1,16 +1,25 @@
 import asyncio
-import json
+import heapq
+import orjson
 import logging
 import time
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Tuple
 from datetime import datetime, timezone
-import random
 
 from app.config import settings
 from app.observability.events import EventType
+from app.ratelimit.limiter import get_async_redis_client
 
 logger = logging.getLogger(__name__)
 
+# Canned hints used until a helper LLM is wired in
+HINT_SUGGESTIONS = (
+    "It looks like the workflow is waiting. Check if approval is needed?",
+    "Execution seems stuck. You might want to retry the last step.",
+    "The researcher is taking a while. Try simplifying the query.",
+    "Shadow Agent: I noticed a delay. Recommend checking the logs.",
+)
+
 class ShadowAgentService:
     """
     Passive observer that monitors active workflows for stalls/friction.
@@ -23,64 +32,85 @@ class ShadowAgentService:
         self.last_activity: Dict[str, float] = {}
         # run_id -> boolean (has_warned) to prevent spam
         self.warned_runs: Dict[str, bool] = {}
+        # Min-heap of (stall_deadline, run_id). Entries go stale when a run
+        # reports activity again; they are skipped when popped.
+        self._deadlines: List[Tuple[float, str]] = []
+        self._publisher = None
+        # Hint payloads are serialized once and spliced into each event
+        self._hint_payloads = [
+            orjson.Fragment(orjson.dumps({"message": hint, "suggestion_type": "stall_recovery"}))
+            for hint in HINT_SUGGESTIONS
+        ]
+        self._hint_idx = 0
         
         # Config
         self.STALL_THRESHOLD = 120.0 # Seconds (2 mins as per spec)
         self.CHECK_INTERVAL = 10.0
+        # Bounds for runs whose completed/failed event never arrives
+        self.ACTIVITY_TTL = 3600.0
+        self.MAX_TRACKED_RUNS = 10_000
         
     async def start(self):
         self.running = True
         logger.info("Shadow Agent Service started.")
-        asyncio.create_task(self._monitor_loop())
-        asyncio.create_task(self._event_listener())
+        self._tasks = [
+            asyncio.create_task(self._monitor_loop()),
+            asyncio.create_task(self._event_listener()),
+        ]
         
     async def stop(self):
         self.running = False
+        # The listener blocks until the next message, so cancel rather than wait
+        for task in getattr(self, "_tasks", []):
+            task.cancel()
         logger.info("Shadow Agent Service stopped.")
 
     async def _event_listener(self):
         """Listen to ALL workflow events to update activity timestamps."""
-        try:
-            from app.ratelimit.limiter import get_redis_client
-            redis = get_redis_client()
-            if not redis:
-                logger.warning("Redis not available. Shadow Agent disabled.")
-                return
+        redis = get_async_redis_client()
+        if not redis:
+            logger.warning("Redis not available. Shadow Agent disabled.")
+            return
 
-            pubsub = redis.pubsub()
-            # Subscribe to pattern for all workflow events
-            pubsub.psubscribe("workflow:events:*")
-            
-            logger.info("Shadow Agent listening to Redis events...")
-            
-            while self.running:
-                try:
-                    message = pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
-                    if message:
-                        channel = message['channel'].decode('utf-8')
-                        # Extract run_id from "workflow:events:{run_id}"
-                        run_id = channel.split(":")[-1]
-                        
-                        data = json.loads(message['data'])
-                        event_type = data.get("event_type")
-                        
-                        # Update activity
-                        self.last_activity[run_id] = time.time()
-                        
-                        # If workflow finished, remove tracking
-                        if event_type in [EventType.WORKFLOW_COMPLETED, EventType.WORKFLOW_FAILED]:
-                            if run_id in self.last_activity:
-                                del self.last_activity[run_id]
-                            if run_id in self.warned_runs:
-                                del self.warned_runs[run_id]
-                                
-                    await asyncio.sleep(0.01)
-                except Exception as e:
-                    logger.error(f"Shadow Agent listener error: {e}")
-                    await asyncio.sleep(5)
+        while self.running:
+            pubsub = redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                # Subscribe to pattern for all workflow events
+                await pubsub.psubscribe("workflow:events:*")
+                logger.info("Shadow Agent listening to Redis events...")
+                
+                async for message in pubsub.listen():
+                    if message["type"] != "pmessage":
+                        continue
+                    # Extract run_id from "workflow:events:{run_id}"
+                    run_id = message["channel"].split(":")[-1]
                     
-        except Exception as e:
-            logger.error(f"Shadow Agent setup failed: {e}")
+                    data = orjson.loads(message["data"])
+                    event_type = data.get("event_type")
+                    
+                    # Update activity
+                    now = time.time()
+                    # Re-insert so the dict stays ordered by most recent activity
+                    self.last_activity.pop(run_id, None)
+                    self.last_activity[run_id] = now
+                    heapq.heappush(self._deadlines, (now + self.STALL_THRESHOLD, run_id))
+                    if len(self.last_activity) > self.MAX_TRACKED_RUNS:
+                        self._forget(next(iter(self.last_activity)))
+                    
+                    # If workflow finished, remove tracking
+                    if event_type in [EventType.WORKFLOW_COMPLETED, EventType.WORKFLOW_FAILED]:
+                        self._forget(run_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Shadow Agent listener error: {e}")
+                await asyncio.sleep(5)
+            finally:
+                await pubsub.aclose()
+
+    def _forget(self, run_id: str):
+        self.last_activity.pop(run_id, None)
+        self.warned_runs.pop(run_id, None)
 
     async def _monitor_loop(self):
         """Periodic check for stalled runs."""
@@ -89,14 +119,24 @@ class ShadowAgentService:
                 now = time.time()
                 stalled_runs = []
                 
-                for run_id, last_time in list(self.last_activity.items()):
-                    if now - last_time > self.STALL_THRESHOLD:
-                        if not self.warned_runs.get(run_id):
-                            stalled_runs.append(run_id)
+                # Only runs whose deadline has passed are inspected
+                while self._deadlines and self._deadlines[0][0] <= now:
+                    _, run_id = heapq.heappop(self._deadlines)
+                    last_time = self.last_activity.get(run_id)
+                    if last_time is None or now - last_time < self.STALL_THRESHOLD:
+                        continue  # finished, or active again with a later deadline queued
+                    if now - last_time >= self.ACTIVITY_TTL:
+                        self._forget(run_id)
+                        continue
+                    # Look at it again once it has been idle for ACTIVITY_TTL
+                    heapq.heappush(self._deadlines, (last_time + self.ACTIVITY_TTL, run_id))
+                    if not self.warned_runs.get(run_id) and run_id not in stalled_runs:
+                        stalled_runs.append(run_id)
                 
-                for run_id in stalled_runs:
-                    await self.trigger_hint(run_id)
-                    self.warned_runs[run_id] = True
+                if stalled_runs:
+                    await self.trigger_hints(stalled_runs)
+                    for run_id in stalled_runs:
+                        self.warned_runs[run_id] = True
                     
             except Exception as e:
                 logger.error(f"Shadow Agent monitor error: {e}")
@@ -105,60 +145,59 @@ class ShadowAgentService:
 
     async def trigger_hint(self, run_id: str):
         """Generate and publish a hint for a stalled run."""
-        logger.info(f"Stall detected for run {run_id}. Generating hint...")
+        await self.trigger_hints([run_id])
+
+    async def trigger_hints(self, run_ids: List[str]):
+        """
+        Generate hints for stalled runs and publish them as 'shadow.hint'
+        events in one pipelined round-trip. Events go straight to Redis so
+        the API/WS process picks them up.
+        """
+        logger.info(f"Stall detected for runs {run_ids}. Generating hints...")
         
         try:
-            # 1. Get minimal context (e.g., last few DB messages)
-            # For efficiency/privacy, we might just look at the last known agent state if we had it.
-            # Here we'll generate a generic or semi-contextual hint.
-            
-            hint_text = await self._generate_llm_hint(run_id)
+            payloads = await asyncio.gather(*[self._generate_llm_hint(run_id) for run_id in run_ids])
+            timestamp = datetime.now(timezone.utc).isoformat()
             
-            # 2. Publish 'shadow.hint' event
-            from app.observability.events import emit_workflow_event
-            # We define a custom event type string since it's not in the Enum yet (or update Enum)
-            # Using raw emit via imported emitter or just leveraging the event bus directly.
-            
-            # Re-using the router's connection manager broadcast would be ideal but that's in-process.
-            # We must publish to Redis so the API/WS process picks it up.
-            
-            event = {
-                "timestamp": datetime.now(timezone.utc).isoformat(),
-                "run_id": run_id,
-                "event_type": "shadow.hint",
-                "payload": {
-                    "message": hint_text,
-                    "suggestion_type": "stall_recovery"
-                }
-            }
+            redis = self._get_publisher()
+            if not redis:
+                return
             
-            # Publish to Redis
-            from app.ratelimit.limiter import get_redis_client
-            redis = get_redis_client()
-            if redis:
-                channel = f"workflow:events:{run_id}"
-                redis.publish(channel, json.dumps(event))
-                logger.info(f"Published shadow hint for {run_id}")
+            async with redis.pipeline(transaction=False) as pipe:
+                for run_id, payload in zip(run_ids, payloads):
+                    event = {
+                        "timestamp": timestamp,
+                        "run_id": run_id,
+                        "event_type": "shadow.hint",
+                        "payload": payload
+                    }
+                    pipe.publish(f"workflow:events:{run_id}", orjson.dumps(event))
+                await pipe.execute()
+            logger.info(f"Published shadow hints for {run_ids}")
                 
         except Exception as e:
             logger.error(f"Failed to generate/publish hint: {e}")
 
-    async def _generate_llm_hint(self, run_id: str) -> str:
+    def _get_publisher(self):
+        """Async Redis client used for publishing hints, created on first use."""
+        if self._publisher is None:
+            self._publisher = get_async_redis_client()
+        return self._publisher
+
+    async def _generate_llm_hint(self, run_id: str) -> orjson.Fragment:
         """
-        Call LLM in read-only mode to suggest a fix.
+        Call LLM in read-only mode to suggest a fix; returns the serialized
+        hint payload.
         Mocked for this implementation to avoid cost/complexity without actual keys configured in env for a 'Helper'.
         In prod, use a cheaper model (e.g. Haiku or Llama-3-8B).
         """
         # In a real implementation: fetch last state/messages from DB
         # prompt = f"User is stuck. Last agent: {last_agent}. Last output: {last_output}. Suggest 1 sentence fix."
         
-        suggestions = [
-            "It looks like the workflow is waiting. Check if approval is needed?",
-            "Execution seems stuck. You might want to retry the last step.",
-            "The researcher is taking a while. Try simplifying the query.",
-            "Shadow Agent: I noticed a delay. Recommend checking the logs."
-        ]
-        return random.choice(suggestions)
+        # Rotate through the canned hints
+        payload = self._hint_payloads[self._hint_idx]
+        self._hint_idx = (self._hint_idx + 1) % len(self._hint_payloads)
+        return payload
 
 # Singleton
 shadow_agent = ShadowAgentService()
@@ -1,22 +1,27 @@
 """
-Tracing wrapper for finalizer, planner, executor, and coder agents.
+Tracing wrapper for finalizer, planner, executor, coder, and combined agents.
 
 This module wraps the existing agent functions with distributed tracing.
 """
 
 import time
+import asyncio
 import logging
 import inspect
 from typing import Callable, Dict, Any
-from app.observability.tracing import get_tracer, trace_span, add_span_attributes, set_span_error
+from app.observability.tracing import (
+    get_tracer, trace_span, add_span_attributes, set_span_error,
+    active_workflow_id, active_agent_id
+)
 from app.observability.events import emit_workflow_event, EventType
-from app.reliability.checkpoint import save_checkpoint
+from app.reliability.checkpoint import enqueue_checkpoint
 
 # Import original agent functions
 from app.agents import planner as planner_module
 from app.agents import executor as executor_module
 from app.agents import coder as coder_module
 from app.agents import finalizer as finalizer_module
+from app.agents import combined as combined_module
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +32,7 @@ AGENT_PROGRESS = {
     "executor": 60,
     "coder": 80,
     "finalizer": 100,
+    "combined": 100,
 }
 
 # Create tracers
@@ -34,6 +40,14 @@ planner_tracer = get_tracer("agent.planner")
 executor_tracer = get_tracer("agent.executor")
 coder_tracer = get_tracer("agent.coder")
 finalizer_tracer = get_tracer("agent.finalizer")
+combined_tracer = get_tracer("agent.combined")
+
+# Static span attributes per agent, built once; only workflow ids are added per call
+_PLANNER_ATTRS = {"agent.id": "planner", "agent.role": "planner", "agent.name": "Planner"}
+_EXECUTOR_ATTRS = {"agent.id": "executor", "agent.role": "executor", "agent.name": "Executor"}
+_CODER_ATTRS = {"agent.id": "coder", "agent.role": "coder", "agent.name": "Coder"}
+_FINALIZER_ATTRS = {"agent.id": "finalizer", "agent.role": "finalizer", "agent.name": "Finalizer"}
+_COMBINED_ATTRS = {"agent.id": "combined", "agent.role": "combined", "agent.name": "Combined"}
 
 
 async def _execute_with_reliability(
@@ -41,7 +55,8 @@ async def _execute_with_reliability(
     agent_id: str, 
     agent_name: str, 
     node_func: Callable[[Dict], Dict], 
-    state: Dict
+    state: Dict,
+    base_attrs: Dict[str, Any]
 ) -> Dict:
     """
     Helper to execute an agent node with tracing, checkpointing, and error handling.
@@ -59,13 +74,13 @@ async def _execute_with_reliability(
         payload={"agent_id": agent_id}
     )
     
-    # 1. Checkpoint before execution
+    # 1. Checkpoint before execution (written in the background)
     try:
         # We save a lightweight snapshot - just the agent ID for now or full state if serializable.
         # State might contain non-serializable objects (like messages with local objects), 
         # so we rely on checkpoint utility's best effort or filter it.
         # For now, pass full state and let checkpoint utility handle/serialize what it can.
-        save_checkpoint(workflow_id, agent_id, state)
+        enqueue_checkpoint(workflow_id, agent_id, state)
     except Exception as e:
         logger.warning(f"Failed to save checkpoint for {agent_id}: {e}")
 
@@ -73,24 +88,22 @@ async def _execute_with_reliability(
     with trace_span(
         tracer, 
         f"agent.{agent_id}", 
-        attributes={
+        attributes=base_attrs | {
             "workflow.run_id": run_id,
-            "workflow.id": workflow_id
+            "workflow.id": workflow_id,
+            "agent.query_complexity": state.get("query_complexity", "UNKNOWN"),
         }
     ) as agent_span:
+        # Expose workflow/agent identity to inner LLM calls and cost callbacks
+        workflow_token = active_workflow_id.set(workflow_id)
+        agent_token = active_agent_id.set(agent_id)
         try:
-            # Inject context into state so inner functions can pick it up
-            # Note: Agents must pass this down to LLM calls if not using a global context contextvar.
-            # Since our agents take `state` as input, this is a clean way to pass metadata.
-            # We'll augment the state dict passed to the node function.
-            state_with_context = state.copy()
-            state_with_context["active_workflow_id"] = workflow_id
-            state_with_context["active_agent_id"] = agent_id
-            
             if inspect.iscoroutinefunction(node_func):
-                result = await node_func(state_with_context)
+                result = await node_func(state)
             else:
-                result = node_func(state_with_context)
+                # Run blocking nodes in a worker thread so parallel graph
+                # branches (executor/coder) actually overlap.
+                result = await asyncio.to_thread(node_func, state)
                 
             add_span_attributes(agent_span, {"agent.status": "success"})
             
@@ -132,29 +145,37 @@ async def _execute_with_reliability(
             # We'll fail hard for now as per "allow workflow designers to specify... fallback".
             # Without explicit configuration passed in, strict failure is safer than silent corruption.
             raise e
+        finally:
+            active_workflow_id.reset(workflow_token)
+            active_agent_id.reset(agent_token)
 
 # Wrapped Agent Nodes
 async def traced_planner_node(state: Dict) -> Dict:
     """Planner node with tracing and reliability."""
     return await _execute_with_reliability(
-        planner_tracer, "planner", "Planner", planner_module.planner_node, state
+        planner_tracer, "planner", "Planner", planner_module.planner_node, state, _PLANNER_ATTRS
     )
 
 async def traced_executor_node(state: Dict) -> Dict:
     """Executor node with tracing and reliability."""
     return await _execute_with_reliability(
-        executor_tracer, "executor", "Executor", executor_module.executor_node, state
+        executor_tracer, "executor", "Executor", executor_module.executor_node, state, _EXECUTOR_ATTRS
     )
 
 async def traced_coder_node(state: Dict) -> Dict:
     """Coder node with tracing and reliability."""
     return await _execute_with_reliability(
-        coder_tracer, "coder", "Coder", coder_module.coder_node, state
+        coder_tracer, "coder", "Coder", coder_module.coder_node, state, _CODER_ATTRS
     )
 
 async def traced_finalizer_node(state: Dict) -> Dict:
     """Finalizer node with tracing and reliability."""
     return await _execute_with_reliability(
-        finalizer_tracer, "finalizer", "Finalizer", finalizer_module.finalizer_node, state
+        finalizer_tracer, "finalizer", "Finalizer", finalizer_module.finalizer_node, state, _FINALIZER_ATTRS
     )
 
+async def traced_combined_node(state: Dict) -> Dict:
+    """Combined executor/finalizer node with tracing and reliability."""
+    return await _execute_with_reliability(
+        combined_tracer, "combined", "Combined", combined_module.combined_node, state, _COMBINED_ATTRS
+    )
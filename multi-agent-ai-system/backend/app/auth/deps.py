@@ -1,8 +1,10 @@
-from typing import Annotated
+import time
+from typing import Annotated, Dict, Tuple
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.auth import models, schemas
@@ -11,24 +13,54 @@ from app.database import get_db
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_PREFIX}/auth/token")
 
+_JWT_ALGORITHMS = (settings.JWT_ALGORITHM,)
+
+# Raised as-is, never mutated, so one instance serves every request
+_CREDENTIALS_EXCEPTION = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
+# Verified token -> (user id, cached until). Repeat requests with the same
+# token skip the JWT verify and the email lookup; an entry never outlives the
+# token's own expiry.
+TOKEN_CACHE_TTL_SECONDS = 60
+TOKEN_CACHE_MAX_ENTRIES = 4096
+_token_cache: Dict[str, Tuple[str, float]] = {}
+
 async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)], db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+    now = time.time()
+    cached = _token_cache.get(token)
+    if cached is not None:
+        user_id, cached_until = cached
+        user = db.get(models.User, user_id) if cached_until > now else None
+        if user is not None:
+            return user
+        # Expired, or the user was deleted: a user re-registered with the same
+        # email in the same second gets a byte-identical token, so verify it
+        # again and look the email up instead of rejecting it
+        _token_cache.pop(token, None)
+
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=_JWT_ALGORITHMS)
         username: str = payload.get("sub")
         if username is None:
-            raise credentials_exception
+            raise _CREDENTIALS_EXCEPTION
         token_data = schemas.TokenData(username=username)
     except JWTError:
-        raise credentials_exception
+        raise _CREDENTIALS_EXCEPTION
     
-    user = db.query(models.User).filter(models.User.email == token_data.username).first()
+    user = db.execute(
+        select(models.User).where(models.User.email == token_data.username)
+    ).scalar_one_or_none()
     if user is None:
-        raise credentials_exception
+        raise _CREDENTIALS_EXCEPTION
+
+    if len(_token_cache) >= TOKEN_CACHE_MAX_ENTRIES:
+        # Evict the oldest insertion (dicts keep insertion order)
+        _token_cache.pop(next(iter(_token_cache)))
+    _token_cache[token] = (user.id, min(now + TOKEN_CACHE_TTL_SECONDS, payload.get("exp", now)))
     return user
 
 async def get_current_active_user(current_user: Annotated[models.User, Depends(get_current_user)]):
@@ -0,0 +1,14 @@
+"""
+Response caching for LLM-backed agent nodes.
+"""
+
+from .llm_cache import cached_invoke, acached_invoke, acached_structured_invoke, make_cache_key
+from .semantic_cache import SemanticCache
+
+__all__ = [
+    "cached_invoke",
+    "acached_invoke",
+    "acached_structured_invoke",
+    "make_cache_key",
+    "SemanticCache",
+]
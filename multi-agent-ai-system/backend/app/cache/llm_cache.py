@@ -0,0 +1,197 @@
+"""
+Exact-match LLM Response Cache
+
+Caches completion text keyed by a BLAKE2b digest of the prompt template id
+and the canonicalised chain inputs. Uses Redis when REDIS_URL is configured
+(shared across workers), otherwise a per-process TTL dict. The async helpers
+run Redis calls in a worker thread so they don't block the event loop.
+"""
+
+import json
+import asyncio
+import time
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "llm:cache:"
+MAX_MEMORY_ENTRIES = 1024
+
+
+class _MemoryCache:
+    """Thread-safe in-process TTL cache used when Redis is unavailable."""
+    
+    def __init__(self, max_entries: int = MAX_MEMORY_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: Dict[str, Tuple[float, str]] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            return value
+    
+    def set(self, key: str, value: str, ttl: int) -> None:
+        with self._lock:
+            if len(self._entries) >= self.max_entries and key not in self._entries:
+                # Evict the oldest insertion (dicts keep insertion order)
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[key] = (time.time() + ttl, value)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_memory_cache = _MemoryCache()
+_redis_client = None
+_redis_checked = False
+
+
+def _get_redis():
+    """Resolve the Redis client once per process; None if not configured."""
+    global _redis_client, _redis_checked
+    if not _redis_checked:
+        try:
+            from app.ratelimit.limiter import get_redis_client
+            _redis_client = get_redis_client()
+        except Exception as e:
+            logger.warning(f"Redis not available for LLM cache: {e}")
+            _redis_client = None
+        _redis_checked = True
+    return _redis_client
+
+
+def make_cache_key(template_id: str, inputs: Dict[str, Any]) -> str:
+    """
+    Build a cache key from a template id and chain inputs.
+    Inputs are serialised with sorted keys so dict ordering does not matter.
+    """
+    payload = json.dumps(inputs, sort_keys=True, default=str)
+    digest = hashlib.blake2b(
+        f"{template_id}\x00{payload}".encode("utf-8"), digest_size=16
+    ).hexdigest()
+    return f"{KEY_PREFIX}{template_id}:{digest}"
+
+
+def get_cached_response(key: str) -> Optional[str]:
+    if not settings.LLM_CACHE_ENABLED:
+        return None
+    
+    redis = _get_redis()
+    if redis:
+        try:
+            return redis.get(key)
+        except Exception as e:
+            logger.warning(f"LLM cache read failed: {e}")
+            return None
+    return _memory_cache.get(key)
+
+
+def set_cached_response(key: str, value: str, ttl: Optional[int] = None) -> None:
+    if not settings.LLM_CACHE_ENABLED or not value:
+        return
+    
+    ttl = ttl or settings.LLM_CACHE_TTL_SECONDS
+    redis = _get_redis()
+    if redis:
+        try:
+            redis.setex(key, ttl, value)
+        except Exception as e:
+            logger.warning(f"LLM cache write failed: {e}")
+        return
+    _memory_cache.set(key, value, ttl)
+
+
+async def aget_cached_response(key: str) -> Optional[str]:
+    """Async variant of get_cached_response; Redis is read off the event loop."""
+    if not settings.LLM_CACHE_ENABLED:
+        return None
+    
+    redis = _get_redis()
+    if redis:
+        try:
+            return await asyncio.to_thread(redis.get, key)
+        except Exception as e:
+            logger.warning(f"LLM cache read failed: {e}")
+            return None
+    return _memory_cache.get(key)
+
+
+async def aset_cached_response(key: str, value: str, ttl: Optional[int] = None) -> None:
+    """Async variant of set_cached_response; Redis is written off the event loop."""
+    if not settings.LLM_CACHE_ENABLED or not value:
+        return
+    
+    ttl = ttl or settings.LLM_CACHE_TTL_SECONDS
+    redis = _get_redis()
+    if redis:
+        try:
+            await asyncio.to_thread(redis.setex, key, ttl, value)
+        except Exception as e:
+            logger.warning(f"LLM cache write failed: {e}")
+        return
+    _memory_cache.set(key, value, ttl)
+
+
+def clear_memory_cache() -> None:
+    """Drop all in-process entries (Redis entries expire via TTL)."""
+    _memory_cache.clear()
+
+
+def cached_invoke(chain, inputs: Dict[str, Any], template_id: str, ttl: Optional[int] = None, config: Optional[dict] = None) -> str:
+    """
+    Invoke `chain` unless an identical (template_id, inputs) call is cached.
+    Returns the completion text.
+    """
+    key = make_cache_key(template_id, inputs)
+    cached = get_cached_response(key)
+    if cached is not None:
+        logger.info(f"LLM cache hit for {template_id}")
+        return cached
+    
+    response = chain.invoke(inputs, config=config)
+    set_cached_response(key, response.content, ttl)
+    return response.content
+
+
+async def acached_invoke(chain, inputs: Dict[str, Any], template_id: str, ttl: Optional[int] = None, config: Optional[dict] = None) -> str:
+    """Async variant of cached_invoke using chain.ainvoke()."""
+    key = make_cache_key(template_id, inputs)
+    cached = await aget_cached_response(key)
+    if cached is not None:
+        logger.info(f"LLM cache hit for {template_id}")
+        return cached
+    
+    response = await chain.ainvoke(inputs, config=config)
+    await aset_cached_response(key, response.content, ttl)
+    return response.content
+
+
+async def acached_structured_invoke(chain, inputs: Dict[str, Any], template_id: str, ttl: Optional[int] = None, config: Optional[dict] = None) -> Dict[str, Any]:
+    """
+    Async cached call for chains ending in `with_structured_output`.
+    Returns the parsed output as a dict; Pydantic results are dumped first.
+    """
+    key = make_cache_key(template_id, inputs)
+    cached = await aget_cached_response(key)
+    if cached is not None:
+        logger.info(f"LLM cache hit for {template_id}")
+        return json.loads(cached)
+    
+    response = await chain.ainvoke(inputs, config=config)
+    if hasattr(response, "model_dump"):
+        response = response.model_dump()
+    await aset_cached_response(key, json.dumps(response), ttl)
+    return response
@@ -0,0 +1,179 @@
+"""
+Semantic Response Cache
+
+Reuses an earlier result when a new query is a near-duplicate of a cached one
+("explain quantum computing" / "break down quantum computing basics"), judged
+by cosine similarity of local sentence embeddings. Entries live in Redis when
+REDIS_URL is configured, otherwise in a per-process TTL store.
+
+Embeddings come from the optional `fastembed` package; without it every
+lookup misses and nothing is stored.
+"""
+
+import json
+import time
+import base64
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from app.config import settings
+from app.cache.llm_cache import _get_redis
+
+try:
+    from fastembed import TextEmbedding
+except ImportError:
+    TextEmbedding = None
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "llm:semantic:"
+MAX_ENTRIES = 1024
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def _get_model():
+    """Load the embedding model once per process; None if unavailable."""
+    global _model
+    if _model is None and TextEmbedding is not None:
+        with _model_lock:
+            if _model is None:
+                try:
+                    _model = TextEmbedding(model_name=settings.SEMANTIC_CACHE_MODEL)
+                except Exception as e:
+                    logger.warning(f"Semantic cache embedding model unavailable: {e}")
+    return _model
+
+
+def embed(text: str) -> Optional[np.ndarray]:
+    """Return a unit-length embedding of `text`, or None without a model."""
+    model = _get_model()
+    if model is None:
+        return None
+    vector = np.asarray(next(iter(model.embed([text]))), dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class SemanticCache:
+    """
+    Similarity lookup over cached results in one namespace.
+
+    Lookups compare against every live entry with a single matrix product, so
+    the store is capped at `max_entries` (oldest dropped first).
+    """
+
+    def __init__(self, namespace: str, threshold: Optional[float] = None,
+                 ttl: Optional[int] = None, max_entries: int = MAX_ENTRIES):
+        self.namespace = namespace
+        self.threshold = threshold if threshold is not None else settings.SEMANTIC_CACHE_THRESHOLD
+        self.ttl = ttl or settings.SEMANTIC_CACHE_TTL_SECONDS
+        self.max_entries = max_entries
+        self._index_key = f"{KEY_PREFIX}{namespace}:index"
+        self._entries: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def _entry_key(self, text: str) -> str:
+        digest = hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+        return f"{KEY_PREFIX}{self.namespace}:{digest}"
+
+    def lookup(self, text: str) -> Optional[Dict[str, Any]]:
+        """Return the cached value of the most similar entry above threshold."""
+        if not settings.SEMANTIC_CACHE_ENABLED:
+            return None
+        vector = embed(text)
+        if vector is None:
+            return None
+
+        redis = _get_redis()
+        try:
+            if redis:
+                return self._lookup_redis(redis, vector)
+            return self._lookup_memory(vector)
+        except Exception as e:
+            logger.warning(f"Semantic cache lookup failed: {e}")
+            return None
+
+    def store(self, text: str, value: Dict[str, Any]) -> None:
+        if not settings.SEMANTIC_CACHE_ENABLED:
+            return
+        vector = embed(text)
+        if vector is None:
+            return
+
+        key = self._entry_key(text)
+        redis = _get_redis()
+        try:
+            if redis:
+                self._store_redis(redis, key, vector, value)
+            else:
+                self._store_memory(key, vector, value)
+        except Exception as e:
+            logger.warning(f"Semantic cache write failed: {e}")
+
+    def clear(self) -> None:
+        """Drop all in-process entries (Redis entries expire via TTL)."""
+        with self._lock:
+            self._entries.clear()
+
+    # Redis backend: one hash per entry plus a sorted set of keys scored by expiry
+
+    def _lookup_redis(self, redis, vector: np.ndarray) -> Optional[Dict[str, Any]]:
+        redis.zremrangebyscore(self._index_key, "-inf", time.time())
+        keys = redis.zrange(self._index_key, 0, -1)
+        if not keys:
+            return None
+        pipe = redis.pipeline()
+        for key in keys:
+            pipe.hget(key, "embedding")
+        encoded = pipe.execute()
+        live = [(k, e) for k, e in zip(keys, encoded) if e]
+        if not live:
+            return None
+        matrix = np.stack([np.frombuffer(base64.b64decode(e), dtype=np.float32) for _, e in live])
+        best = self._best_match(matrix, vector)
+        if best is None:
+            return None
+        value = redis.hget(live[best][0], "value")
+        return json.loads(value) if value else None
+
+    def _store_redis(self, redis, key: str, vector: np.ndarray, value: Dict[str, Any]) -> None:
+        pipe = redis.pipeline()
+        pipe.hset(key, mapping={
+            "embedding": base64.b64encode(vector.tobytes()).decode("ascii"),
+            "value": json.dumps(value),
+        })
+        pipe.expire(key, self.ttl)
+        pipe.zadd(self._index_key, {key: time.time() + self.ttl})
+        # Keep only the newest max_entries keys
+        pipe.zremrangebyrank(self._index_key, 0, -self.max_entries - 1)
+        pipe.execute()
+
+    # Memory backend
+
+    def _lookup_memory(self, vector: np.ndarray) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            for key in [k for k, (expires_at, _, _) in self._entries.items() if expires_at < now]:
+                del self._entries[key]
+            entries = list(self._entries.values())
+        if not entries:
+            return None
+        best = self._best_match(np.stack([v for _, v, _ in entries]), vector)
+        return entries[best][2] if best is not None else None
+
+    def _store_memory(self, key: str, vector: np.ndarray, value: Dict[str, Any]) -> None:
+        with self._lock:
+            if len(self._entries) >= self.max_entries and key not in self._entries:
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[key] = (time.time() + self.ttl, vector, value)
+
+    def _best_match(self, matrix: np.ndarray, vector: np.ndarray) -> Optional[int]:
+        scores = matrix @ vector
+        best = int(np.argmax(scores))
+        return best if scores[best] >= self.threshold else None
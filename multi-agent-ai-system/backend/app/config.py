@@ -1,4 +1,5 @@
-from pydantic_settings import BaseSettings
+from pydantic import field_validator
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import List
 import os
 
@@ -13,14 +14,24 @@ class Settings(BaseSettings):
     BASE_DIR: str = r"C:\Users\HP\Documents\antigravity\multi-agent-ai-system\backend"
     DATABASE_URL: str = f"sqlite:///{os.path.join(BASE_DIR, 'app.db')}"
     
-    # File Uploads
-    UPLOAD_DIR: str = "uploads"
-    
     # Groq API
     GROQ_API_KEY: str | None = None
     GROQ_MODEL: str = "llama-3.3-70b-versatile"
     GROQ_RATE_LIMIT: int = 70  # requests per minute
     
+    # LLM response cache (exact match on template + inputs)
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_TTL_SECONDS: int = 3600
+    
+    # Semantic cache for near-duplicate research queries (needs `fastembed`)
+    SEMANTIC_CACHE_ENABLED: bool = True
+    SEMANTIC_CACHE_MODEL: str = "BAAI/bge-small-en-v1.5"
+    SEMANTIC_CACHE_THRESHOLD: float = 0.93
+    SEMANTIC_CACHE_TTL_SECONDS: int = 86400
+    
+    # Code verification sandbox (0 disables the warm container pool)
+    SANDBOX_POOL_SIZE: int = 4
+    
     # OpenAI API (optional fallback)
     OPENAI_API_KEY: str | None = None
     
@@ -59,13 +70,18 @@ class Settings(BaseSettings):
     QUOTA_ENFORCEMENT: str = "soft"  # soft|hard
     REDIS_URL: str | None = None
     
-    class Config:
-        env_file = ".env"
-        case_sensitive = True
-        extra = "ignore"  # Ignore extra environment variables
+    # LLM cost tracking. Persist mode "each" keeps a llm_cost_records row per
+    # call; "aggregate" only updates the per-workflow/agent rollup (plus a span event)
+    COST_TRACKING_ENABLED: bool = True
+    COST_PERSIST_MODE: str = "aggregate"  # each|aggregate
+    
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        case_sensitive=True,
+        extra="ignore",  # Ignore extra environment variables
+    )
 
     # Validator restored to Enforce Backend DB regardless of .env
-    from pydantic import field_validator
     @field_validator("DATABASE_URL", mode="before")
     @classmethod
     def resolve_database_url(cls, v: str) -> str:
@@ -0,0 +1,122 @@
+"""
+Buffered writer for CostRecord rows.
+
+LLM callbacks append rows here instead of committing one INSERT per call; a
+daemon thread bulk-inserts them every FLUSH_INTERVAL_SECONDS, or sooner once
+FLUSH_BATCH_SIZE rows are waiting. Each flush also folds the batch into the
+llm_cost_rollup totals in the same transaction. In aggregate mode callers
+skip the per-call row and only add to the pending rollup increments.
+Readers that need up-to-date totals call flush_cost_records() first.
+"""
+
+import atexit
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.database import SessionLocal
+from app.costs.models import CostRecord, CostRollup
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL_SECONDS = 0.5
+FLUSH_BATCH_SIZE = 100
+
+_buffer: List[Dict[str, Any]] = []
+# (workflow_id, agent_id) -> [cost_usd, tokens_total] not yet in llm_cost_rollup
+_rollup: Dict[Tuple[str, str], List[float]] = {}
+_lock = threading.Lock()
+_wakeup = threading.Event()
+_worker: Optional[threading.Thread] = None
+
+
+def add_cost_record(row: Dict[str, Any]) -> None:
+    """Queue a CostRecord column mapping for the next bulk insert."""
+    with _lock:
+        _buffer.append(row)
+        full = len(_buffer) >= FLUSH_BATCH_SIZE
+    _ensure_worker()
+    if full:
+        _wakeup.set()
+
+
+def add_cost_usage(workflow_id: Optional[str], agent_id: Optional[str],
+                   cost_usd: float, tokens_total: int) -> None:
+    """Add usage to the rollup totals without keeping a per-call row."""
+    with _lock:
+        _add_to_rollup(_rollup, workflow_id, agent_id, cost_usd, tokens_total)
+    _ensure_worker()
+
+
+def flush_cost_records() -> None:
+    """Write every queued row and rollup increment now."""
+    with _lock:
+        if not _buffer and not _rollup:
+            return
+        batch = _buffer[:]
+        _buffer.clear()
+        totals = dict(_rollup)
+        _rollup.clear()
+
+    for row in batch:
+        _add_to_rollup(totals, row["workflow_id"], row["agent_id"], row["cost_usd"], row["tokens_total"])
+
+    db = SessionLocal()
+    try:
+        if batch:
+            db.bulk_insert_mappings(CostRecord, batch)
+        _increment_rollup(db, totals)
+        db.commit()
+        logger.debug(f"Flushed {len(batch)} LLM cost records, {len(totals)} rollup keys")
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Failed to flush {len(batch)} LLM cost records: {e}")
+    finally:
+        db.close()
+
+
+def _add_to_rollup(totals: Dict[Tuple[str, str], List[float]], workflow_id: Optional[str],
+                   agent_id: Optional[str], cost_usd: float, tokens_total: int) -> None:
+    entry = totals.setdefault((workflow_id or "", agent_id or ""), [0.0, 0])
+    entry[0] += cost_usd
+    entry[1] += tokens_total
+
+
+def _increment_rollup(db, totals: Dict[Tuple[str, str], List[float]]) -> None:
+    """Add per-(workflow, agent) totals to llm_cost_rollup with one upsert."""
+    insert = postgresql_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    stmt = insert(CostRollup).values([
+        {"workflow_id": workflow_id, "agent_id": agent_id, "total_cost": cost, "total_tokens": tokens}
+        for (workflow_id, agent_id), (cost, tokens) in totals.items()
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[CostRollup.workflow_id, CostRollup.agent_id],
+        set_={
+            "total_cost": CostRollup.total_cost + stmt.excluded.total_cost,
+            "total_tokens": CostRollup.total_tokens + stmt.excluded.total_tokens,
+        },
+    )
+    db.execute(stmt)
+
+
+def _run() -> None:
+    while True:
+        _wakeup.wait(FLUSH_INTERVAL_SECONDS)
+        _wakeup.clear()
+        flush_cost_records()
+
+
+def _ensure_worker() -> None:
+    global _worker
+    if _worker is not None:
+        return
+    with _lock:
+        if _worker is None:
+            _worker = threading.Thread(target=_run, name="cost-buffer", daemon=True)
+            _worker.start()
+
+
+atexit.register(flush_cost_records)
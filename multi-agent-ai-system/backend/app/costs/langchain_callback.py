@@ -4,42 +4,40 @@ from uuid import UUID
 from langchain_core.callbacks import BaseCallbackHandler
 from langchain_core.outputs import LLMResult
 from app.costs.tracker import record_llm_usage
+from app.observability.tracing import active_workflow_id, active_agent_id
 
 logger = logging.getLogger(__name__)
 
 class CostTrackingCallbackHandler(BaseCallbackHandler):
     """
     LangChain callback handler to track token usage and cost.
-    Expects metadata to be passed in the config or available in the run context.
+    IDs not passed explicitly are taken from the active workflow/agent context.
     """
     
     def __init__(self, workflow_id: str = None, agent_id: str = None):
-        self.workflow_id = workflow_id
-        self.agent_id = agent_id
+        self.workflow_id = workflow_id or active_workflow_id.get()
+        self.agent_id = agent_id or active_agent_id.get()
 
     def on_llm_end(self, response: LLMResult, *, run_id: UUID, parent_run_id: Optional[UUID] = None, **kwargs: Any) -> Any:
         try:
-            # Aggregate usage from all generations
-            prompt_tokens = 0
-            completion_tokens = 0
-            model_name = "unknown"
+            # Groq/OpenAI usually provide 'token_usage' in llm_output
+            llm_output = response.llm_output or {}
+            token_usage = llm_output.get("token_usage")
+            model_name = llm_output.get("model_name", "unknown")
             
-            # Check LLMResult llm_output
-            if response.llm_output:
-                # Groq/OpenAI usually provides 'token_usage' in llm_output
-                token_usage = response.llm_output.get("token_usage", {})
+            if token_usage:
                 prompt_tokens = token_usage.get("prompt_tokens", 0)
                 completion_tokens = token_usage.get("completion_tokens", 0)
-                model_name = response.llm_output.get("model_name", model_name)
-            
-            # If not in llm_output, check generations (some providers put it there)
-            if prompt_tokens == 0 and completion_tokens == 0 and response.generations:
-                # This is fallback, usually not accurate for aggregated calls but better than 0
-                for generation in response.generations[0]:
-                     if generation.generation_info:
-                         usage = generation.generation_info.get("token_usage", {})
-                         prompt_tokens += usage.get("prompt_tokens", 0)
-                         completion_tokens += usage.get("completion_tokens", 0)
+            else:
+                # Some providers put usage on the generations instead
+                prompt_tokens = 0
+                completion_tokens = 0
+                if response.generations:
+                    for generation in response.generations[0]:
+                        if generation.generation_info:
+                            usage = generation.generation_info.get("token_usage", {})
+                            prompt_tokens += usage.get("prompt_tokens", 0)
+                            completion_tokens += usage.get("completion_tokens", 0)
 
             record_llm_usage(
                 workflow_id=self.workflow_id,
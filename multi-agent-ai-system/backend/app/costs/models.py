@@ -23,3 +23,19 @@ class CostRecord(Base):
     cost_usd = Column(Float, default=0.0)
     
     metadata_json = Column(Text, nullable=True)
+
+
+class CostRollup(Base):
+    """
+    Running cost/token totals per (workflow, agent), updated by the buffered
+    writer. With COST_PERSIST_MODE="each" they match llm_cost_records; in
+    "aggregate" mode (the default) no per-call rows are kept and this table
+    is the only record of spend. Missing ids are stored as "".
+    """
+    __tablename__ = "llm_cost_rollup"
+
+    workflow_id = Column(String, primary_key=True, default="")
+    agent_id = Column(String, primary_key=True, default="", index=True)
+
+    total_cost = Column(Float, nullable=False, default=0.0)
+    total_tokens = Column(Integer, nullable=False, default=0)
@@ -24,21 +24,16 @@ MODEL_PRICING = {
     }
 }
 
+# Per-token (prompt, completion) rates, derived once from MODEL_PRICING
+_PRICING_PER_TOKEN = {
+    key: (pricing["prompt"] * 1e-6, pricing["completion"] * 1e-6)
+    for key, pricing in MODEL_PRICING.items()
+}
+_DEFAULT_PER_TOKEN = _PRICING_PER_TOKEN["default"]
+
 def estimate_cost_usd(model: str, prompt_tokens: int, completion_tokens: int, provider: str = "groq") -> float:
     """
     Calculate cost in USD based on model pricing.
     """
-    key = f"{provider}/{model}"
-    pricing = MODEL_PRICING.get(key)
-    
-    if not pricing:
-        # Try to find a partial match or default
-        pricing = MODEL_PRICING.get("default")
-    
-    if not pricing:
-        return 0.0
-        
-    cost_prompt = (prompt_tokens / 1_000_000) * pricing["prompt"]
-    cost_completion = (completion_tokens / 1_000_000) * pricing["completion"]
-    
-    return round(cost_prompt + cost_completion, 8)
+    prompt_rate, completion_rate = _PRICING_PER_TOKEN.get(f"{provider}/{model}", _DEFAULT_PER_TOKEN)
+    return round(prompt_tokens * prompt_rate + completion_tokens * completion_rate, 8)
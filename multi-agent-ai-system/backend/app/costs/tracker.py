@@ -1,16 +1,19 @@
 import logging
-import json
+import orjson
+from datetime import datetime
+from typing import Dict, List
 from sqlalchemy import func, desc
 from app.database import SessionLocal
-from app.costs.models import CostRecord
+from app.costs.models import CostRecord, CostRollup
+from app.costs.buffer import add_cost_record, add_cost_usage, flush_cost_records
 from app.costs.pricing import estimate_cost_usd
-from app.observability.tracing import get_tracer, add_span_attributes, trace_span
+from app.observability.tracing import get_current_span
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
-# Check for config flag
-COST_TRACKING_ENABLED = getattr(settings, "COST_TRACKING_ENABLED", True)
+COST_TRACKING_ENABLED = settings.COST_TRACKING_ENABLED
+COST_PERSIST_MODE = settings.COST_PERSIST_MODE
 
 def record_llm_usage(
     workflow_id: str = None,
@@ -24,7 +27,10 @@ def record_llm_usage(
     metadata: dict = None
 ):
     """
-    Record LLM usage and cost to the database and current trace span.
+    Record LLM usage and cost to the current trace span, and queue it for the
+    buffered database writer (see app.costs.buffer). In "aggregate" persist
+    mode only the rollup totals are stored; the per-call detail goes to a
+    span event instead of a llm_cost_records row.
     """
     if not COST_TRACKING_ENABLED:
         return
@@ -32,11 +38,10 @@ def record_llm_usage(
     tokens_total = tokens_prompt + tokens_completion
     cost_usd = estimate_cost_usd(model, tokens_prompt, tokens_completion, provider)
     
-    # Add to tracing immediately
-    # We assume we are inside a span if this is called during execution
-    try:
-         # Standard semantic conventions or custom
-        add_span_attributes(None, { # None uses current span
+    # Add to the current span, if one is being recorded
+    span = get_current_span()
+    if span is not None and span.is_recording():
+        span.set_attributes({
             "llm.tokens.prompt": tokens_prompt,
             "llm.tokens.completion": tokens_completion,
             "llm.tokens.total": tokens_total,
@@ -44,28 +49,35 @@ def record_llm_usage(
             "llm.model": model,
             "llm.provider": provider
         })
-    except Exception:
-        pass # Tracing might fail or not be active
 
-    # Persist to DB
+    if COST_PERSIST_MODE == "aggregate":
+        if span is not None and span.is_recording():
+            span.add_event("llm.usage", {
+                "workflow.id": workflow_id or "",
+                "agent.id": agent_id or "",
+                "llm.model": model,
+                "llm.tokens.total": tokens_total,
+                "llm.cost.usd": cost_usd
+            })
+        add_cost_usage(workflow_id, agent_id, cost_usd, tokens_total)
+        return
+
+    # Persist to DB (batched off the caller's thread)
     try:
-        db = SessionLocal()
-        record = CostRecord(
-            workflow_id=workflow_id,
-            run_id=run_id,
-            agent_id=agent_id,
-            tool_name=tool_name,
-            provider=provider,
-            model=model,
-            tokens_prompt=tokens_prompt,
-            tokens_completion=tokens_completion,
-            tokens_total=tokens_total,
-            cost_usd=cost_usd,
-            metadata_json=json.dumps(metadata) if metadata else None
-        )
-        db.add(record)
-        db.commit()
-        db.close()
+        add_cost_record({
+            "timestamp": datetime.utcnow(),
+            "workflow_id": workflow_id,
+            "run_id": run_id,
+            "agent_id": agent_id,
+            "tool_name": tool_name,
+            "provider": provider,
+            "model": model,
+            "tokens_prompt": tokens_prompt,
+            "tokens_completion": tokens_completion,
+            "tokens_total": tokens_total,
+            "cost_usd": cost_usd,
+            "metadata_json": orjson.dumps(metadata).decode() if metadata else None
+        })
         
         logger.info(f"Recorded LLM Cost: ${cost_usd:.6f} (Tokens: {tokens_total}) for {agent_id or 'unknown'}")
         
@@ -74,48 +86,96 @@ def record_llm_usage(
 
 
 def get_cost_summary_by_workflow(workflow_id: str):
+    flush_cost_records()
     db = SessionLocal()
     try:
-        query = db.query(
-            func.sum(CostRecord.cost_usd).label("total_cost"),
-            func.sum(CostRecord.tokens_total).label("total_tokens")
-        ).filter(CostRecord.workflow_id == workflow_id)
+        total_cost, total_tokens = db.query(
+            func.sum(CostRollup.total_cost),
+            func.sum(CostRollup.total_tokens)
+        ).filter(CostRollup.workflow_id == workflow_id).one()
         
-        result = query.first()
         return {
             "workflow_id": workflow_id,
-            "total_cost": result.total_cost or 0.0,
-            "total_tokens": result.total_tokens or 0
+            "total_cost": total_cost or 0.0,
+            "total_tokens": total_tokens or 0
         }
     finally:
         db.close()
 
+def get_costs_by_workflows(workflow_ids: List[str]) -> Dict[str, float]:
+    """Total cost per workflow for many workflows in one GROUP BY query."""
+    flush_cost_records()
+    db = SessionLocal()
+    try:
+        rows = db.query(
+            CostRollup.workflow_id,
+            func.sum(CostRollup.total_cost)
+        ).filter(CostRollup.workflow_id.in_(workflow_ids)).group_by(CostRollup.workflow_id).all()
+        
+        return {workflow_id: total_cost or 0.0 for workflow_id, total_cost in rows}
+    finally:
+        db.close()
+
 def get_cost_summary_by_agent(agent_id: str):
+    flush_cost_records()
     db = SessionLocal()
     try:
-        query = db.query(
-            func.sum(CostRecord.cost_usd).label("total_cost"),
-            func.sum(CostRecord.tokens_total).label("total_tokens")
-        ).filter(CostRecord.agent_id == agent_id)
+        total_cost, total_tokens = db.query(
+            func.sum(CostRollup.total_cost),
+            func.sum(CostRollup.total_tokens)
+        ).filter(CostRollup.agent_id == agent_id).one()
         
-        result = query.first()
         return {
             "agent_id": agent_id,
-            "total_cost": result.total_cost or 0.0,
-            "total_tokens": result.total_tokens or 0
+            "total_cost": total_cost or 0.0,
+            "total_tokens": total_tokens or 0
         }
     finally:
         db.close()
 
 def get_top_expensive_workflows(limit: int = 10):
+    flush_cost_records()
     db = SessionLocal()
     try:
         # Group by workflow_id
         current_costs = db.query(
-            CostRecord.workflow_id,
-            func.sum(CostRecord.cost_usd).label("total_cost")
-        ).group_by(CostRecord.workflow_id).order_by(desc("total_cost")).limit(limit).all()
+            CostRollup.workflow_id,
+            func.sum(CostRollup.total_cost).label("total_cost")
+        ).group_by(CostRollup.workflow_id).order_by(desc("total_cost")).limit(limit).all()
+        
+        return [{"workflow_id": r.workflow_id or None, "total_cost": r.total_cost} for r in current_costs]
+    finally:
+        db.close()
+
+def rebuild_cost_rollup():
+    """
+    Recompute llm_cost_rollup from llm_cost_records, e.g. for records written
+    before the rollup table existed.
+
+    Refused in "aggregate" persist mode: no llm_cost_records rows are written
+    there, so rebuilding would wipe the rollup totals.
+    """
+    if COST_PERSIST_MODE == "aggregate":
+        raise RuntimeError(
+            "rebuild_cost_rollup needs COST_PERSIST_MODE='each'; in aggregate "
+            "mode llm_cost_rollup is the only copy of the cost totals"
+        )
+    flush_cost_records()
+    db = SessionLocal()
+    try:
+        rows = db.query(
+            func.coalesce(CostRecord.workflow_id, "").label("workflow_id"),
+            func.coalesce(CostRecord.agent_id, "").label("agent_id"),
+            func.sum(CostRecord.cost_usd).label("total_cost"),
+            func.sum(CostRecord.tokens_total).label("total_tokens")
+        ).group_by("workflow_id", "agent_id").all()
         
-        return [{"workflow_id": r.workflow_id, "total_cost": r.total_cost} for r in current_costs]
+        db.query(CostRollup).delete()
+        db.bulk_insert_mappings(CostRollup, [
+            {"workflow_id": r.workflow_id, "agent_id": r.agent_id,
+             "total_cost": r.total_cost or 0.0, "total_tokens": r.total_tokens or 0}
+            for r in rows
+        ])
+        db.commit()
     finally:
         db.close()
@@ -1,22 +1,71 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
 from sqlalchemy import create_engine
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from app.config import settings
 from app.models.base import Base
+import app.models  # noqa: F401 -- registers every model with Base.metadata
+
+# Server databases: fail fast instead of queueing when exhausted, and recycle
+# before idle timeouts. Each process gets a budget of 10 pooled + 20 overflow
+# connections, split evenly between the sync and async engines, so it holds
+# at most 30: an API process and two workers stay under max_connections=100.
+SERVER_POOL_OPTIONS = {"pool_size": 5, "max_overflow": 10, "pool_timeout": 5, "pool_recycle": 1800}
 
 # Only use check_same_thread for SQLite databases
 connect_args = {}
+engine_options = {"pool_pre_ping": True}
 if settings.DATABASE_URL.startswith("sqlite"):
     connect_args = {"check_same_thread": False}
+else:
+    engine_options.update(SERVER_POOL_OPTIONS)
 
 engine = create_engine(
-    settings.DATABASE_URL, connect_args=connect_args
+    settings.DATABASE_URL, connect_args=connect_args, **engine_options
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# asyncio drivers for the same database, used by code running on the event
+# loop (e.g. the LangGraph checkpointer) instead of hopping to a thread
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+_async_session_factory: Optional[async_sessionmaker[AsyncSession]] = None
+
+def _async_database_url() -> URL:
+    url = make_url(settings.DATABASE_URL)
+    backend = url.get_backend_name()
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+
+def get_async_sessionmaker() -> async_sessionmaker[AsyncSession]:
+    """Get the AsyncSession factory, creating the async engine on first use."""
+    global _async_session_factory
+    if _async_session_factory is None:
+        url = _async_database_url()
+        async_options = {"pool_pre_ping": True}
+        if url.get_backend_name() != "sqlite":
+            async_options.update(SERVER_POOL_OPTIONS)
+        async_engine = create_async_engine(url, **async_options)
+        _async_session_factory = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    return _async_session_factory
+
+@asynccontextmanager
+async def unpooled_async_session() -> AsyncIterator[AsyncSession]:
+    """
+    AsyncSession on a throwaway, unpooled engine. For sync entry points (CLI,
+    Huey tasks) that wrap a call in asyncio.run: pooled asyncpg connections
+    are bound to the event loop that opened them and can't be reused there.
+    """
+    async_engine = create_async_engine(_async_database_url(), poolclass=NullPool)
+    try:
+        async with AsyncSession(async_engine, autoflush=False, expire_on_commit=False) as db:
+            yield db
+    finally:
+        await async_engine.dispose()
+
 def init_db():
-    # Import all models here so they are registered with Base
-    # app.models imports all models in its __init__.py
-    import app.models
     Base.metadata.create_all(bind=engine)
 
 def get_db():
@@ -25,3 +74,7 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    async with get_async_sessionmaker()() as db:
+        yield db
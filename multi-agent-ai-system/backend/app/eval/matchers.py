@@ -90,6 +90,13 @@ MATCHERS = {
     "semantic": semantic_match
 }
 
+# Matchers that only ever return 0.0 or 1.0; the rest pass at 0.8
+STRICT_MATCHERS = ("exact", "json_key")
+
+def pass_threshold(matcher_name: str) -> float:
+    """Minimum score for a case using this matcher to count as passed."""
+    return 1.0 if matcher_name in STRICT_MATCHERS else 0.8
+
 def run_matcher(matcher_name: str, expected: Any, actual: Any) -> float:
     matcher_func = MATCHERS.get(matcher_name, exact_match)
     return matcher_func(expected, actual)
@@ -1,6 +1,15 @@
 from typing import Dict, Tuple
+from sqlalchemy.orm import selectinload
 from app.database import SessionLocal
 from app.eval.store import EvaluationRun, EvaluationResult
+from app.eval.matchers import pass_threshold
+
+def _case_passed(result: EvaluationResult) -> bool:
+    passed = result.metrics.get("passed")
+    if passed is None:
+        # Results stored before the verdict was recorded in metrics
+        passed = result.score >= pass_threshold(result.reason.replace("Matcher: ", ""))
+    return passed
 
 def generate_report(run_id: int) -> Tuple[Dict, str]:
     """
@@ -8,11 +17,21 @@ def generate_report(run_id: int) -> Tuple[Dict, str]:
     """
     db = SessionLocal()
     try:
-        run = db.query(EvaluationRun).get(run_id)
+        # One round-trip for the run plus a batched IN load of its results,
+        # restricted to the columns the report uses
+        run = db.query(EvaluationRun).options(
+            selectinload(EvaluationRun.results).load_only(
+                EvaluationResult.case_id,
+                EvaluationResult.score,
+                EvaluationResult.reason,
+                EvaluationResult.metrics
+            )
+        ).filter_by(id=run_id).one_or_none()
         if not run:
             return {}, f"Run {run_id} not found."
             
-        results = db.query(EvaluationResult).filter(EvaluationResult.run_id == run_id).all()
+        results = run.results
+        case_passed = [_case_passed(r) for r in results]
         
         # Summary
         summary = {
@@ -24,27 +43,28 @@ def generate_report(run_id: int) -> Tuple[Dict, str]:
             "total_cost": run.total_cost_usd,
             "start": str(run.start_ts),
             "cases_total": len(results),
-            "cases_passed": sum(1 for r in results if r.score >= (1.0 if "exact" in r.reason else 0.8)) # Rough heuristic
+            "cases_passed": sum(case_passed)
         }
         
         # Markdown Builder
-        md = f"# Evaluation Report: Run {run.id}\n\n"
-        md += f"**Workflow:** `{run.workflow_id}` | **Version:** `{run.candidate_version}`\n\n"
-        md += f"**Status:** {'✅ PASSED' if run.passed else '❌ FAILED'}\n"
-        md += f"**Score:** {run.aggregated_score:.2f} / 1.0\n"
-        md += f"**Total Cost:** ${run.total_cost_usd:.6f}\n\n"
-        
-        md += "## Case Details\n\n"
-        md += "| Case ID | Score | Status | Latency (ms) | Cost ($) | Matcher |\n"
-        md += "|---------|-------|--------|--------------|----------|---------|\n"
+        parts = [
+            f"# Evaluation Report: Run {run.id}\n\n",
+            f"**Workflow:** `{run.workflow_id}` | **Version:** `{run.candidate_version}`\n\n",
+            f"**Status:** {'✅ PASSED' if run.passed else '❌ FAILED'}\n",
+            f"**Score:** {run.aggregated_score:.2f} / 1.0\n",
+            f"**Total Cost:** ${run.total_cost_usd:.6f}\n\n",
+            "## Case Details\n\n",
+            "| Case ID | Score | Status | Latency (ms) | Cost ($) | Matcher |\n",
+            "|---------|-------|--------|--------------|----------|---------|\n",
+        ]
         
-        for r in results:
-            status_icon = "✅" if r.score >= (0.8 if "semantic" in r.reason or "context" in r.reason else 1.0) else "❌"
+        for r, passed in zip(results, case_passed):
+            status_icon = "✅" if passed else "❌"
             latency = r.metrics.get("latency_ms", 0)
             cost = r.metrics.get("cost_usd", 0.0)
             matcher = r.reason.replace("Matcher: ", "")
-            md += f"| {r.case_id} | {r.score:.2f} | {status_icon} | {latency:.0f} | {cost:.5f} | {matcher} |\n"
+            parts.append(f"| {r.case_id} | {r.score:.2f} | {status_icon} | {latency:.0f} | {cost:.5f} | {matcher} |\n")
             
-        return summary, md
+        return summary, "".join(parts)
     finally:
         db.close()
@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import Optional, Any
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, JSON, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, JSON, ForeignKey, Index
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 
 from app.models.base import Base
@@ -26,6 +26,10 @@ class EvaluationRun(Base):
 
 class EvaluationResult(Base):
     __tablename__ = "evaluation_results"
+    # Leading run_id serves the per-run report load as well as case lookups
+    __table_args__ = (
+        Index("ix_eval_results_run_case", "run_id", "case_id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     run_id: Mapped[int] = mapped_column(Integer, ForeignKey("evaluation_runs.id"))
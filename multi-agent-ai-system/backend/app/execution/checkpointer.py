@@ -10,13 +10,41 @@ from langgraph.checkpoint.base import (
 )
 from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
 
-from sqlalchemy import select, delete
-from sqlalchemy.orm import Session
+from sqlalchemy import select, delete, func
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from contextlib import asynccontextmanager
 
-from app.database import SessionLocal
+from app.database import get_async_sessionmaker
 from app.models.checkpoint import Checkpoint as DBCheckpoint, CheckpointWrite as DBCheckpointWrite
 
+try:
+    import zstandard
+    _zstd_compressor = zstandard.ZstdCompressor(level=3)
+    _zstd_decompressor = zstandard.ZstdDecompressor()
+except ImportError:
+    zstandard = None
+
+# Serialized checkpoints at least this large are stored zstd-compressed,
+# prefixed with ZSTD_TAG. Uncompressed payloads never start with that byte
+# (a checkpoint serializes to a map), so older rows still load as-is.
+COMPRESS_MIN_BYTES = 1024
+ZSTD_TAG = b"\x01"
+
+def _compress(payload: bytes) -> bytes:
+    if zstandard is None or len(payload) < COMPRESS_MIN_BYTES:
+        return payload
+    return ZSTD_TAG + _zstd_compressor.compress(payload)
+
+def _decompress(payload: bytes) -> bytes:
+    if payload[:1] == ZSTD_TAG:
+        if zstandard is None:
+            raise RuntimeError("Checkpoint is zstd-compressed but zstandard is not installed")
+        return _zstd_decompressor.decompress(payload[1:])
+    return payload
+
 class AsyncPostgresSaver(BaseCheckpointSaver):
     """
     Async implementation of a LangGraph CheckpointSaver using SQLAlchemy.
@@ -26,23 +54,11 @@ class AsyncPostgresSaver(BaseCheckpointSaver):
         self.serde = serializer or JsonPlusSerializer()
 
     @asynccontextmanager
-    async def _get_session(self) -> AsyncIterator[Session]:
-        # Helper to get a session. 
-        # Since SessionLocal is sync, we wrap operations in run_in_executor eventually, 
-        # OR we just use valid sync calls if we were truly async-db backed.
-        # But here we are mixing async worker with sync SQLAlchemy.
-        # For true async, we'd need AsyncSession. 
-        # For now, we will run the DB ops synchronously in this async method 
-        # (which blocks the loop, but it's acceptable for this MVP or we use run_in_executor).
-        # Better: run blocking DB calls in executor.
-        
-        # However, to keep it simple and given worker.py uses run_in_executor for DB calls,
-        # we can just use the sync session here effectively.
-        db = SessionLocal()
-        try:
+    async def _get_session(self) -> AsyncIterator[AsyncSession]:
+        # Native asyncio session, so checkpoint I/O overlaps with other
+        # coroutines instead of queueing on the default executor's threads
+        async with get_async_sessionmaker()() as db:
             yield db
-        finally:
-            db.close()
 
     async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
         """
@@ -51,42 +67,27 @@ class AsyncPostgresSaver(BaseCheckpointSaver):
         thread_id = config["configurable"]["thread_id"]
         checkpoint_id = config["configurable"].get("checkpoint_id")
 
-        import asyncio
-        loop = asyncio.get_running_loop()
-
-        def _get():
-            with SessionLocal() as db:
-                if checkpoint_id:
-                    stmt = select(DBCheckpoint).where(
-                        DBCheckpoint.thread_id == thread_id, 
-                        DBCheckpoint.checkpoint_id == checkpoint_id
-                    )
-                else:
-                    stmt = select(DBCheckpoint).where(
-                        DBCheckpoint.thread_id == thread_id
-                    ).order_by(DBCheckpoint.checkpoint_id.desc()).limit(1)
-                
-                result = db.execute(stmt).scalars().first()
-                if not result:
-                    return None
-                
-                # Load writes
-                writes_stmt = select(DBCheckpointWrite).where(
-                    DBCheckpointWrite.thread_id == thread_id,
-                    DBCheckpointWrite.checkpoint_id == result.checkpoint_id
-                )
-                writes_result = db.execute(writes_stmt).scalars().all()
-                
-                return result, writes_result
-
-        data = await loop.run_in_executor(None, _get)
+        if checkpoint_id:
+            stmt = select(DBCheckpoint).where(
+                DBCheckpoint.thread_id == thread_id, 
+                DBCheckpoint.checkpoint_id == checkpoint_id
+            )
+        else:
+            stmt = select(DBCheckpoint).where(
+                DBCheckpoint.thread_id == thread_id
+            ).order_by(DBCheckpoint.checkpoint_id.desc()).limit(1)
         
-        if not data:
+        # Checkpoint and its pending writes in one round trip
+        stmt = stmt.options(joinedload(DBCheckpoint.writes))
+        async with self._get_session() as db:
+            db_checkpoint = (await db.execute(stmt)).unique().scalars().first()
+        
+        if not db_checkpoint:
             return None
         
-        db_checkpoint, db_writes = data
+        db_writes = db_checkpoint.writes
         
-        checkpoint = self.serde.loads_typed((db_checkpoint.type_, db_checkpoint.checkpoint))
+        checkpoint = self.serde.loads_typed((db_checkpoint.type_, _decompress(db_checkpoint.checkpoint)))
         metadata = self.serde.loads_typed((db_checkpoint.type_, db_checkpoint.metadata_))
         parent_config = (
             {"configurable": {"thread_id": thread_id, "checkpoint_id": db_checkpoint.parent_checkpoint_id}}
@@ -131,25 +132,20 @@ class AsyncPostgresSaver(BaseCheckpointSaver):
         checkpoint_id = checkpoint["id"]
         
         type_, serialized_checkpoint = self.serde.dumps_typed(checkpoint)
+        serialized_checkpoint = _compress(serialized_checkpoint)
         _, serialized_metadata = self.serde.dumps_typed(metadata)
         
-        import asyncio
-        loop = asyncio.get_running_loop()
-
-        def _put():
-            with SessionLocal() as db:
-                db_cp = DBCheckpoint(
-                    thread_id=thread_id,
-                    checkpoint_id=checkpoint_id,
-                    parent_checkpoint_id=parent_checkpoint_id,
-                    type_=type_,
-                    checkpoint=serialized_checkpoint,
-                    metadata_=serialized_metadata
-                )
-                db.merge(db_cp)
-                db.commit()
-
-        await loop.run_in_executor(None, _put)
+        async with self._get_session() as db:
+            db_cp = DBCheckpoint(
+                thread_id=thread_id,
+                checkpoint_id=checkpoint_id,
+                parent_checkpoint_id=parent_checkpoint_id,
+                type_=type_,
+                checkpoint=serialized_checkpoint,
+                metadata_=serialized_metadata
+            )
+            await db.merge(db_cp)
+            await db.commit()
 
         return {
             "configurable": {
@@ -170,25 +166,41 @@ class AsyncPostgresSaver(BaseCheckpointSaver):
         thread_id = config["configurable"]["thread_id"]
         checkpoint_id = config["configurable"]["checkpoint_id"]
         
-        import asyncio
-        loop = asyncio.get_running_loop()
-
-        def _put_writes():
-            with SessionLocal() as db:
-                for idx, (channel, value) in enumerate(writes):
-                    type_, serialized_value = self.serde.dumps_typed(value)
-                    
-                    # Upsert (merge)
-                    db_write = DBCheckpointWrite(
-                        thread_id=thread_id,
-                        checkpoint_id=checkpoint_id,
-                        task_id=task_id,
-                        idx=idx,
-                        channel=channel,
-                        type_=type_,
-                        value=serialized_value
-                    )
-                    db.merge(db_write)
-                db.commit()
-
-        await loop.run_in_executor(None, _put_writes)
+        rows = [
+            {
+                "thread_id": thread_id,
+                "checkpoint_id": checkpoint_id,
+                "task_id": task_id,
+                "idx": idx,
+                "channel": channel,
+                "type_": type_,
+                "value": serialized_value,
+            }
+            for idx, (channel, value) in enumerate(writes)
+            for type_, serialized_value in [self.serde.dumps_typed(value)]
+        ]
+        if not rows:
+            return
+
+        async with self._get_session() as db:
+            # One INSERT ... ON CONFLICT for the whole batch instead of a
+            # merge (SELECT + INSERT/UPDATE) per write
+            insert = postgresql_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+            stmt = insert(DBCheckpointWrite).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[
+                    DBCheckpointWrite.thread_id,
+                    DBCheckpointWrite.checkpoint_id,
+                    DBCheckpointWrite.task_id,
+                    DBCheckpointWrite.idx,
+                ],
+                set_={
+                    "channel": stmt.excluded.channel,
+                    "type": stmt.excluded.type,
+                    "value": stmt.excluded.value,
+                    "updated_at": func.now(),
+                },
+            )
+            await db.execute(stmt)
+            await db.commit()
+
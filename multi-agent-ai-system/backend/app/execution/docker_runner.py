@@ -1,13 +1,159 @@
 import docker
+import queue
+import requests
 import time
 import logging
+from typing import Iterable, Optional, Tuple
 from app.execution.sandbox import ExecutionService, ExecutionResult
 
 logger = logging.getLogger(__name__)
 
+WORKSPACE = "/workspace"
+# Exit status of coreutils `timeout` when the command ran out of time
+TIMEOUT_EXIT_CODE = 124
+# Output kept per stream; anything past this is dropped and marked
+MAX_OUTPUT_BYTES = 1024 * 1024
+TRUNCATED_MARKER = "\n...[truncated]"
+
+
+class SandboxPool:
+    """
+    Fixed-size pool of idle, pre-started containers.
+
+    Each container runs `sleep infinity` with a tmpfs mounted at /workspace, so
+    executing code is a `docker exec` instead of a full container start. The
+    script is passed with `python -c` on the exec itself: the archive API
+    can't write into a tmpfs mount. The workspace (scratch space for the
+    script) is wiped before a container goes back into the pool; containers
+    that time out or fail to reset are discarded and replaced.
+    """
+
+    def __init__(self, client, size: int = 4, image: str = "python:3.10-slim"):
+        self.client = client
+        self.size = size
+        self.image = image
+        self._idle: "queue.Queue" = queue.Queue()
+        for _ in range(size):
+            self._add_container()
+
+    def _add_container(self) -> None:
+        try:
+            container = self.client.containers.run(
+                self.image,
+                command=["sleep", "infinity"],
+                detach=True,
+                mem_limit="128m",
+                network_disabled=True,
+                tmpfs={WORKSPACE: "rw,size=16m"},
+                working_dir=WORKSPACE,
+            )
+            self._idle.put(container)
+        except Exception as e:
+            logger.error(f"Failed to start pooled sandbox container: {e}")
+
+    def acquire(self, timeout: float = 5.0):
+        """Take an idle container, or return None if none frees up in time."""
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def release(self, container) -> None:
+        """Reset the container's workspace and return it to the pool."""
+        try:
+            result = container.exec_run(["sh", "-c", f"rm -rf {WORKSPACE}/* {WORKSPACE}/.[!.]*"])
+            if result.exit_code == 0:
+                self._idle.put(container)
+                return
+        except Exception as e:
+            logger.warning(f"Failed to reset pooled sandbox container: {e}")
+        self.discard(container)
+
+    def discard(self, container) -> None:
+        """Remove a container that can no longer be trusted and start a replacement."""
+        try:
+            container.remove(force=True)
+        except Exception:
+            pass
+        self._add_container()
+
+    def execute(self, container, code: str, timeout: int) -> ExecutionResult:
+        """Run `code` in a pooled container, then release or discard it."""
+        start_time = time.time()
+        reusable = False
+        try:
+            exit_code, output = container.exec_run(
+                ["timeout", str(timeout), "python", "-c", code],
+                workdir=WORKSPACE,
+                demux=True,
+            )
+            duration = (time.time() - start_time) * 1000
+            if exit_code == TIMEOUT_EXIT_CODE:
+                # The script may have left processes behind, so don't reuse it
+                return ExecutionResult(
+                    stdout="",
+                    stderr="Execution timed out",
+                    exit_code=-1,
+                    duration_ms=duration
+                )
+            reusable = True
+            stdout, stderr = _collect_output([output or (None, None)])
+            return ExecutionResult(
+                stdout=stdout,
+                stderr=stderr,
+                exit_code=exit_code,
+                duration_ms=duration
+            )
+        finally:
+            if reusable:
+                self.release(container)
+            else:
+                self.discard(container)
+
+    def close(self) -> None:
+        """Remove every idle container."""
+        while True:
+            try:
+                container = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                container.remove(force=True)
+            except Exception:
+                pass
+
+
+def _collect_output(chunks: Iterable[Tuple[Optional[bytes], Optional[bytes]]],
+                    limit: int = MAX_OUTPUT_BYTES) -> Tuple[str, str]:
+    """
+    Decode demuxed (stdout, stderr) chunks, keeping at most `limit` bytes of
+    each stream so a runaway script can't exhaust memory.
+    """
+    buffers = (bytearray(), bytearray())
+    truncated = [False, False]
+    for chunk in chunks:
+        for i, data in enumerate(chunk):
+            if not data or truncated[i]:
+                continue
+            room = limit - len(buffers[i])
+            if len(data) > room:
+                buffers[i].extend(data[:room])
+                truncated[i] = True
+            else:
+                buffers[i].extend(data)
+        if all(truncated):
+            break
+    return tuple(
+        # The cut may split a multi-byte character
+        buf.decode('utf-8', errors='ignore') + TRUNCATED_MARKER if cut else buf.decode('utf-8')
+        for buf, cut in zip(buffers, truncated)
+    )
+
+
 class DockerSandbox(ExecutionService):
-    def __init__(self, image: str = "python:3.10-slim"):
+    def __init__(self, image: str = "python:3.10-slim", pool_size: int = 0):
         self.image = image
+        self.pool: Optional[SandboxPool] = None
         try:
             self.client = docker.from_env()
             # Ensure image exists
@@ -15,6 +161,13 @@ class DockerSandbox(ExecutionService):
         except Exception as e:
             logger.error(f"Failed to initialize Docker client: {e}")
             self.client = None
+        if self.client and pool_size > 0:
+            self.pool = SandboxPool(self.client, size=pool_size, image=image)
+
+    def close(self) -> None:
+        """Tear down any pre-warmed containers."""
+        if self.pool:
+            self.pool.close()
 
     def execute_code(self, language: str, code: str, timeout: int = 30) -> ExecutionResult:
         if not self.client:
@@ -33,6 +186,12 @@ class DockerSandbox(ExecutionService):
                 duration_ms=0
             )
 
+        if self.pool:
+            container = self.pool.acquire()
+            if container is not None:
+                return self._execute_pooled(container, code, timeout)
+            logger.warning("Sandbox pool exhausted; starting a one-off container")
+
         container = None
         start_time = time.time()
         try:
@@ -64,42 +223,34 @@ class DockerSandbox(ExecutionService):
                 # pids_limit=10, # Prevent fork bombs - requires newer docker
             )
             
-            # Wait for result or timeout
-            # containers.get().wait() blocks?
-            
-            # Poll for status
-            elapsed = 0
-            while container.status in ['created', 'running', 'restarting']:
-                container.reload()
-                if container.status == 'exited':
-                    break
-                time.sleep(0.1)
-                elapsed += 0.1
-                if elapsed > timeout:
-                    container.kill()
-                    return ExecutionResult(
-                        stdout="",
-                        stderr="Execution timed out",
-                        exit_code=-1,
-                        duration_ms=elapsed * 1000
-                    )
+            # Block on a single wait request; the daemon answers as soon as the
+            # container exits. Over the unix socket a read timeout can surface
+            # as either exception.
+            try:
+                result = container.wait(timeout=timeout)
+            except (requests.exceptions.ReadTimeout, requests.exceptions.ConnectionError):
+                container.kill()
+                return ExecutionResult(
+                    stdout="",
+                    stderr="Execution timed out",
+                    exit_code=-1,
+                    duration_ms=(time.time() - start_time) * 1000
+                )
             
-            result = container.wait()
             exit_code = result.get('StatusCode', 0)
-            logs = container.logs(stdout=True, stderr=True) # Returns bytes, mixed
             
-            # Separate stdout/stderr if possible? 
-            # docker SDK returns combined if stream=False usually, or generic bytes.
-            # container.logs(stdout=True, stderr=False) -> stdout
-            
-            stdout_params = container.logs(stdout=True, stderr=False).decode('utf-8')
-            stderr_params = container.logs(stdout=False, stderr=True).decode('utf-8')
+            # One request for both streams: logs() can't demux, but attach
+            # with logs=True replays the output of the exited container as
+            # (stdout, stderr) chunks, read incrementally up to the size cap
+            stdout, stderr = _collect_output(container.attach(
+                stdout=True, stderr=True, stream=True, logs=True, demux=True
+            ))
             
             duration = (time.time() - start_time) * 1000
             
             return ExecutionResult(
-                stdout=stdout_params,
-                stderr=stderr_params,
+                stdout=stdout,
+                stderr=stderr,
                 exit_code=exit_code,
                 duration_ms=duration
             )
@@ -118,3 +269,16 @@ class DockerSandbox(ExecutionService):
                     container.remove(force=True)
                 except:
                     pass
+
+    def _execute_pooled(self, container, code: str, timeout: int) -> ExecutionResult:
+        start_time = time.time()
+        try:
+            return self.pool.execute(container, code, timeout)
+        except Exception as e:
+            logger.error(f"Docker execution failed: {e}")
+            return ExecutionResult(
+                stdout="",
+                stderr=str(e),
+                exit_code=-1,
+                duration_ms=(time.time() - start_time) * 1000
+            )
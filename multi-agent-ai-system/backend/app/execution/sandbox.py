@@ -1,3 +1,4 @@
+import asyncio
 from abc import ABC, abstractmethod
 from pydantic import BaseModel
 from typing import Optional
@@ -15,3 +16,10 @@ class ExecutionService(ABC):
         Execute code in a sandboxed environment.
         """
         pass
+
+    async def aexecute_code(self, language: str, code: str, timeout: int = 30) -> ExecutionResult:
+        """
+        Async variant of execute_code. The default runs the blocking
+        implementation in a worker thread so the event loop stays free.
+        """
+        return await asyncio.to_thread(self.execute_code, language, code, timeout)
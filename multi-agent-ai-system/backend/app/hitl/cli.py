@@ -1,4 +1,7 @@
 import sys
+import asyncio
+import argparse
+from app.database import unpooled_async_session
 from app.hitl.queue import ReviewQueueService
 from app.hitl.decisions import DecisionService
 from app.hitl.models import ReviewDecision, ReviewStatus
@@ -9,25 +12,31 @@ def print_header(title: str):
     print(f"  {title}")
     print("=" * 60 + "\n")
 
-def cmd_list(workflow_id: str = None):
+# Listing row layout; workflow ids are cut to 18 chars within a 20-char column
+LIST_ROW_FMT = "{:<38} | {:<20.18} | {:<10} | {:<6} | {}"
+LIST_RULE = "-" * 100
+
+async def cmd_list(workflow_id: str = None):
     print_header("Pending Approval Requests")
-    with ReviewQueueService() as service:
-        reviews = service.list_pending_reviews(workflow_id)
+    async with unpooled_async_session() as db, ReviewQueueService(db) as service:
+        reviews = await service.list_pending_reviews_summary(workflow_id)
         if not reviews:
             print("No pending reviews found.")
             return
 
-        print(f"{'ID':<38} | {'Workflow':<20} | {'Step':<10} | {'Risk':<6} | {'Created At'}")
-        print("-" * 100)
-        for r in reviews:
-            created = r.created_at.strftime("%Y-%m-%d %H:%M")
-            print(f"{r.id:<38} | {r.workflow_id[:18]:<20} | {r.step_name:<10} | {r.risk_level:<6} | {created}")
-        print("-" * 100)
-        print(f"Total: {len(reviews)} pending requests.")
-
-def cmd_show(review_id: str):
-    with ReviewQueueService() as service:
-        r = service.get_review(review_id)
+        fmt = LIST_ROW_FMT.format
+        lines = [fmt("ID", "Workflow", "Step", "Risk", "Created At"), LIST_RULE]
+        lines.extend(
+            fmt(r.id, r.workflow_id, r.step_name, r.risk_level, r.created_at.isoformat(sep=" ", timespec="minutes"))
+            for r in reviews
+        )
+        lines.append(LIST_RULE)
+        lines.append(f"Total: {len(reviews)} pending requests.\n")
+        sys.stdout.write("\n".join(lines))
+
+async def cmd_show(review_id: str):
+    async with unpooled_async_session() as db, ReviewQueueService(db) as service:
+        r = await service.get_review(review_id)
         if not r:
             print(f"Error: Review {review_id} not found.")
             return
@@ -46,10 +55,10 @@ def cmd_show(review_id: str):
         print(r.proposed_action or "(No context provided)")
         print("-" * 60)
 
-def cmd_approve(review_id: str, actor: str = "cli_admin", reason: str = "Approved via CLI"):
-    with DecisionService() as service:
+async def cmd_approve(review_id: str, actor: str = "cli_admin", reason: str = "Approved via CLI"):
+    async with unpooled_async_session() as db, DecisionService(db) as service:
         try:
-            req = service.submit_decision(review_id, ReviewDecision.APPROVE, actor, reason)
+            req = await service.submit_decision(review_id, ReviewDecision.APPROVE, actor, reason)
             print(f"✅ Review {review_id} APPROVED.")
             print("Triggering workflow resumption...")
             
@@ -63,10 +72,10 @@ def cmd_approve(review_id: str, actor: str = "cli_admin", reason: str = "Approve
         except ValueError as e:
             print(f"Error: {e}")
 
-def cmd_reject(review_id: str, actor: str = "cli_admin", reason: str = "Rejected via CLI"):
-    with DecisionService() as service:
+async def cmd_reject(review_id: str, actor: str = "cli_admin", reason: str = "Rejected via CLI"):
+    async with unpooled_async_session() as db, DecisionService(db) as service:
         try:
-            req = service.submit_decision(review_id, ReviewDecision.REJECT, actor, reason)
+            req = await service.submit_decision(review_id, ReviewDecision.REJECT, actor, reason)
             print(f"❌ Review {review_id} REJECTED.")
             
             # Rejection might involve aborting or fallback. 
@@ -81,37 +90,35 @@ def cmd_reject(review_id: str, actor: str = "cli_admin", reason: str = "Rejected
         except ValueError as e:
             print(f"Error: {e}")
 
-def handle_hitl_command():
-    if len(sys.argv) < 3:
-        print("Usage: python manage.py hitl <command> [args]")
-        print("\nCommands:")
-        print("  list [workflow_id]         - List pending reviews")
-        print("  show <review_id>           - Show review details")
-        print("  approve <review_id> [note] - Approve a request")
-        print("  reject <review_id> [note]  - Reject a request")
-        sys.exit(1)
-
-    command = sys.argv[2]
-    
-    if command == "list":
-        wf_id = sys.argv[3] if len(sys.argv) > 3 else None
-        cmd_list(wf_id)
-    elif command == "show":
-        if len(sys.argv) < 4:
-            print("Error: review_id required")
-            sys.exit(1)
-        cmd_show(sys.argv[3])
-    elif command == "approve":
-        if len(sys.argv) < 4:
-            print("Error: review_id required")
-            sys.exit(1)
-        reason = sys.argv[4] if len(sys.argv) > 4 else "Approved via CLI"
-        cmd_approve(sys.argv[3], reason=reason)
-    elif command == "reject":
-        if len(sys.argv) < 4:
-            print("Error: review_id required")
-            sys.exit(1)
-        reason = sys.argv[4] if len(sys.argv) > 4 else "Rejected via CLI"
-        cmd_reject(sys.argv[3], reason=reason)
-    else:
-        print(f"Unknown command: {command}")
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python manage.py hitl")
+    commands = parser.add_subparsers(dest="command", metavar="<command>", required=True)
+
+    list_cmd = commands.add_parser("list", help="List pending reviews")
+    list_cmd.add_argument("workflow_id", nargs="?")
+
+    show_cmd = commands.add_parser("show", help="Show review details")
+    show_cmd.add_argument("review_id")
+
+    approve_cmd = commands.add_parser("approve", help="Approve a request")
+    approve_cmd.add_argument("review_id")
+    approve_cmd.add_argument("reason", nargs="?", default="Approved via CLI")
+
+    reject_cmd = commands.add_parser("reject", help="Reject a request")
+    reject_cmd.add_argument("review_id")
+    reject_cmd.add_argument("reason", nargs="?", default="Rejected via CLI")
+
+    return parser
+
+def handle_hitl_command(argv: list = None):
+    # manage.py has already consumed "hitl" from sys.argv
+    args = build_parser().parse_args(sys.argv[2:] if argv is None else argv)
+
+    if args.command == "list":
+        asyncio.run(cmd_list(args.workflow_id))
+    elif args.command == "show":
+        asyncio.run(cmd_show(args.review_id))
+    elif args.command == "approve":
+        asyncio.run(cmd_approve(args.review_id, reason=args.reason))
+    elif args.command == "reject":
+        asyncio.run(cmd_reject(args.review_id, reason=args.reason))
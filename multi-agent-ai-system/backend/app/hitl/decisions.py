@@ -1,23 +1,23 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timezone
 import uuid
 
-from app.database import SessionLocal
+from app.database import get_async_sessionmaker
 from app.hitl.models import ReviewRequest, ReviewDecisionRecord, ReviewDecision, ReviewStatus
 
 class DecisionService:
-    def __init__(self, db: Session = None):
-        self.db = db or SessionLocal()
+    def __init__(self, db: AsyncSession = None):
+        self.db = db or get_async_sessionmaker()()
         self._close_on_exit = db is None
 
-    def __enter__(self):
+    async def __aenter__(self):
         return self
 
-    def __exit__(self, exc_type, exc_val, exc_tb):
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
         if self._close_on_exit:
-            self.db.close()
+            await self.db.close()
 
-    def submit_decision(
+    async def submit_decision(
         self,
         review_id: str,
         decision: ReviewDecision,
@@ -26,7 +26,7 @@ class DecisionService:
         metadata: dict = None
     ) -> ReviewRequest:
         
-        request = self.db.query(ReviewRequest).filter(ReviewRequest.id == review_id).first()
+        request = await self.db.get(ReviewRequest, review_id)
         if not request:
             raise ValueError(f"Review request {review_id} not found")
         
@@ -55,8 +55,8 @@ class DecisionService:
         request.decision_by = actor
         request.decision_reason = reason
         
-        self.db.commit()
-        self.db.refresh(request)
+        await self.db.commit()
+        await self.db.refresh(request)
         
         # NOTE: The actual workflow resumption will be triggered by the caller (CLI/API)
         # calling the executor service, as we need to spin up the graph again.
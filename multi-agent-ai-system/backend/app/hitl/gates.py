@@ -1,7 +1,9 @@
+import functools
 from dataclasses import dataclass
+from types import MappingProxyType
 from typing import Optional, Literal
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ApprovalGate:
     step: str # The graph node name (e.g., "executor", "human_review")
     risk_level: Literal["low", "medium", "high"] = "medium"
@@ -12,7 +14,9 @@ class ApprovalGate:
 
 # Global configuration of gates (could be moved to DB dynamically later)
 # For v1, we define them statically or via config
-DEFAULT_GATES = {
+# Read-only for the life of the process, which is what makes caching the
+# lookups below safe
+DEFAULT_GATES = MappingProxyType({
     "executor": ApprovalGate(
         step="executor",
         risk_level="high",
@@ -23,7 +27,12 @@ DEFAULT_GATES = {
         risk_level="medium",
         description="Review code modifications before finalizing."
     )
-}
+})
 
+@functools.lru_cache(maxsize=32)
 def get_gate_for_step(step_name: str) -> Optional[ApprovalGate]:
     return DEFAULT_GATES.get(step_name)
+
+# Warm the cache so worker processes start with every gate resolved
+for _step in DEFAULT_GATES:
+    get_gate_for_step(_step)
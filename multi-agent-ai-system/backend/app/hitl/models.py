@@ -1,4 +1,4 @@
-from sqlalchemy import String, DateTime, JSON, Enum, Text, ForeignKey, Float
+from sqlalchemy import String, DateTime, JSON, Enum, Text, ForeignKey, Float, Index, text
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from datetime import datetime
 from typing import Optional, Dict, Any, List
@@ -20,6 +20,17 @@ class ReviewDecision(str, enum.Enum):
 
 class ReviewRequest(UUIDMixin, TimestampMixin, Base):
     __tablename__ = "review_requests"
+    __table_args__ = (
+        # Partial index for mark_expired; Enum columns store the member name
+        Index(
+            "ix_review_pending_expiry", "expires_at",
+            postgresql_where=text("status = 'PENDING'"),
+            sqlite_where=text("status = 'PENDING'")
+        ),
+        # list_pending_reviews: equality on status/workflow_id, ordered by
+        # created_at (a btree scans backwards for DESC)
+        Index("ix_review_status_workflow_created", "status", "workflow_id", "created_at"),
+    )
 
     # Core Identifiers
     workflow_id: Mapped[str] = mapped_column(String, index=True)
@@ -1,25 +1,26 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import Row, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta, timezone
 from typing import List, Optional, Dict, Any
 import uuid
 
-from app.database import SessionLocal
+from app.database import get_async_sessionmaker
 from app.hitl.models import ReviewRequest, ReviewStatus
 from app.hitl.gates import ApprovalGate
 
 class ReviewQueueService:
-    def __init__(self, db: Session = None):
-        self.db = db or SessionLocal()
+    def __init__(self, db: AsyncSession = None):
+        self.db = db or get_async_sessionmaker()()
         self._close_on_exit = db is None
 
-    def __enter__(self):
+    async def __aenter__(self):
         return self
 
-    def __exit__(self, exc_type, exc_val, exc_tb):
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
         if self._close_on_exit:
-            self.db.close()
+            await self.db.close()
 
-    def create_review_request(
+    async def create_review_request(
         self,
         workflow_id: str,
         run_id: str,
@@ -49,29 +50,45 @@ class ReviewQueueService:
         )
         
         self.db.add(request)
-        self.db.commit()
-        self.db.refresh(request)
+        await self.db.commit()
+        await self.db.refresh(request)
         return request
 
-    def get_review(self, review_id: str) -> Optional[ReviewRequest]:
-        return self.db.query(ReviewRequest).filter(ReviewRequest.id == review_id).first()
+    async def get_review(self, review_id: str) -> Optional[ReviewRequest]:
+        return await self.db.get(ReviewRequest, review_id)
 
-    def list_pending_reviews(self, workflow_id: str = None) -> List[ReviewRequest]:
-        query = self.db.query(ReviewRequest).filter(ReviewRequest.status == ReviewStatus.PENDING)
+    async def list_pending_reviews(self, workflow_id: str = None) -> List[ReviewRequest]:
+        stmt = select(ReviewRequest).where(ReviewRequest.status == ReviewStatus.PENDING)
         if workflow_id:
-            query = query.filter(ReviewRequest.workflow_id == workflow_id)
-        return query.order_by(ReviewRequest.created_at.desc()).all()
+            stmt = stmt.where(ReviewRequest.workflow_id == workflow_id)
+        result = await self.db.execute(stmt.order_by(ReviewRequest.created_at.desc()))
+        return result.scalars().all()
 
-    def mark_expired(self):
-        # Background cleanup to mark expired requests
+    async def list_pending_reviews_summary(self, workflow_id: str = None) -> List[Row]:
+        # Listing columns only, so large proposed_action payloads stay in the DB
+        stmt = select(
+            ReviewRequest.id,
+            ReviewRequest.workflow_id,
+            ReviewRequest.step_name,
+            ReviewRequest.risk_level,
+            ReviewRequest.created_at
+        ).where(ReviewRequest.status == ReviewStatus.PENDING)
+        if workflow_id:
+            stmt = stmt.where(ReviewRequest.workflow_id == workflow_id)
+        result = await self.db.execute(stmt.order_by(ReviewRequest.created_at.desc()))
+        return result.all()
+
+    async def mark_expired(self):
+        # Background cleanup to mark expired requests, in one UPDATE
         now = datetime.now(timezone.utc)
-        expired = self.db.query(ReviewRequest).filter(
-            ReviewRequest.status == ReviewStatus.PENDING,
-            ReviewRequest.expires_at < now
-        ).all()
-        
-        for req in expired:
-            req.status = ReviewStatus.EXPIRED
-        
-        self.db.commit()
-        return len(expired)
+        result = await self.db.execute(
+            update(ReviewRequest)
+            .where(
+                ReviewRequest.status == ReviewStatus.PENDING,
+                ReviewRequest.expires_at < now
+            )
+            .values(status=ReviewStatus.EXPIRED)
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+        return result.rowcount
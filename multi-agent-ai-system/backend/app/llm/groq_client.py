@@ -1,22 +1,28 @@
 import time
+import asyncio
 import logging
-import hashlib
+import weakref
 import functools
-from typing import Optional, Dict, Any, List
+import threading
+from collections import deque
+from typing import Optional, Dict, Any, Deque
 
-from groq import Groq
+import httpx
+from groq import AsyncGroq, Groq
 from langchain_groq import ChatGroq
 from app.config import settings
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Store timestamps of recent requests for rate limiting
-_request_timestamps: List[float] = []
+# Start times of requests in the last minute, oldest first, for rate limiting
+_request_timestamps: Deque[float] = deque()
+_rate_limit_lock = threading.Lock()
 
 from app.reliability.retry import retry_with_backoff
 from app.reliability.circuit_breaker import get_circuit_breaker, CircuitBreakerOpenException
 from app.costs.tracker import record_llm_usage
+from app.observability.tracing import active_workflow_id, active_agent_id
 
 
 def rate_limit_groq(func):
@@ -26,33 +32,99 @@ def rate_limit_groq(func):
     """
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        global _request_timestamps
-        
         # Get rate limit from settings, default to 70 if not set
         rate_limit = getattr(settings, "GROQ_RATE_LIMIT", 70)
         
-        current_time = time.time()
-        
-        # Filter out timestamps older than 60 seconds
-        _request_timestamps = [t for t in _request_timestamps if current_time - t < 60]
-        
-        if len(_request_timestamps) >= rate_limit:
-            # Calculate sleep time
-            oldest_timestamp = _request_timestamps[0]
-            sleep_time = 60 - (current_time - oldest_timestamp)
+        with _rate_limit_lock:
+            current_time = time.time()
+            _prune_timestamps(current_time)
             
-            if sleep_time > 0:
-                logger.warning(f"Groq rate limit reached ({rate_limit}/min). Sleeping for {sleep_time:.2f}s.")
-                time.sleep(sleep_time)
-                # Update current time after sleep
-                current_time = time.time()
+            start_time = current_time
+            if len(_request_timestamps) >= rate_limit:
+                # Next free slot: when the rate_limit-th most recent request
+                # leaves the window. Reserve it before sleeping so concurrent
+                # callers queue behind it instead of all waking together.
+                start_time = max(current_time, _request_timestamps[-rate_limit] + 60)
+            
+            # Record current request
+            _request_timestamps.append(start_time)
         
-        # Record current request
-        _request_timestamps.append(current_time)
+        sleep_time = start_time - current_time
+        if sleep_time > 0:
+            logger.warning(f"Groq rate limit reached ({rate_limit}/min). Sleeping for {sleep_time:.2f}s.")
+            time.sleep(sleep_time)
         
         return func(*args, **kwargs)
     return wrapper
 
+def _prune_timestamps(current_time: float) -> None:
+    """Drop requests older than 60 seconds. Caller holds _rate_limit_lock."""
+    while _request_timestamps and current_time - _request_timestamps[0] >= 60:
+        _request_timestamps.popleft()
+
+_GROQ_CLIENT: Optional[Groq] = None
+_groq_client_lock = threading.Lock()
+
+def _get_client() -> Groq:
+    """
+    Returns the process-wide Groq client for call_groq_sync, so calls reuse
+    its keep-alive connections instead of opening a new pool each time.
+    """
+    global _GROQ_CLIENT
+    if _GROQ_CLIENT is None:
+        with _groq_client_lock:
+            if _GROQ_CLIENT is None:
+                _GROQ_CLIENT = Groq(
+                    api_key=settings.GROQ_API_KEY,
+                    http_client=httpx.Client(
+                        limits=httpx.Limits(max_keepalive_connections=20, max_connections=50),
+                        timeout=60.0
+                    )
+                )
+    return _GROQ_CLIENT
+
+def close_groq_client() -> None:
+    """Close the shared Groq client's connections (application shutdown)."""
+    global _GROQ_CLIENT
+    with _groq_client_lock:
+        if _GROQ_CLIENT is not None:
+            _GROQ_CLIENT.close()
+            _GROQ_CLIENT = None
+
+# Async callers get their own client and rate limiter per event loop (both
+# are bound to the loop they first run on). The limiter is a semaphore of
+# GROQ_RATE_LIMIT permits, each handed back 60s after it was taken; it is
+# separate from the sync deque above.
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncGroq]" = weakref.WeakKeyDictionary()
+_async_rate_limiters: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+def _get_async_client() -> AsyncGroq:
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = AsyncGroq(
+            api_key=settings.GROQ_API_KEY,
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=50),
+                timeout=60.0
+            )
+        )
+    return client
+
+async def aclose_groq_client() -> None:
+    """Close the current event loop's async Groq client (application shutdown)."""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.close()
+
+async def _acquire_rate_slot() -> None:
+    loop = asyncio.get_running_loop()
+    limiter = _async_rate_limiters.get(loop)
+    if limiter is None:
+        limiter = _async_rate_limiters[loop] = asyncio.Semaphore(getattr(settings, "GROQ_RATE_LIMIT", 70))
+    await limiter.acquire()
+    loop.call_later(60, limiter.release)
+
 def get_groq_llm() -> ChatGroq:
     """
     Returns a configured ChatGroq instance.
@@ -68,6 +140,62 @@ def get_groq_llm() -> ChatGroq:
         max_tokens=2000
     )
 
+# ChatGroq also holds an AsyncGroq client bound to the loop it first ran on,
+# and Huey tasks each run the graph in a fresh asyncio.run loop, so async
+# callers get one shared instance per event loop (like _async_clients).
+_shared_chat_llms: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Optional[float], ChatGroq]]" = weakref.WeakKeyDictionary()
+
+def get_shared_chat_llm(request_timeout: Optional[float] = None) -> ChatGroq:
+    """
+    Returns a shared ChatGroq instance for the agent nodes.
+    Reusing one instance per timeout keeps its HTTP connection pool warm
+    instead of paying a fresh TLS handshake on every node invocation.
+    Inside an event loop the instance is scoped to that loop; sync callers
+    share a process-wide one.
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return _get_sync_chat_llm(request_timeout)
+    llms = _shared_chat_llms.setdefault(loop, {})
+    llm = llms.get(request_timeout)
+    if llm is None:
+        llm = llms[request_timeout] = _new_chat_llm(request_timeout)
+    return llm
+
+@functools.lru_cache(maxsize=8)
+def _get_sync_chat_llm(request_timeout: Optional[float]) -> ChatGroq:
+    return _new_chat_llm(request_timeout)
+
+def _new_chat_llm(request_timeout: Optional[float]) -> ChatGroq:
+    return ChatGroq(
+        model_name=settings.GROQ_MODEL,
+        api_key=settings.GROQ_API_KEY,
+        request_timeout=request_timeout
+    )
+
+def _record_usage(response, kwargs: Dict[str, Any]) -> None:
+    try:
+         # Basic usage info from Groq response
+         usage = response.usage
+         prompt_tokens = usage.prompt_tokens if usage else 0
+         completion_tokens = usage.completion_tokens if usage else 0
+         
+         # Identifiers come from kwargs if passed, else the active agent context
+         workflow_id = kwargs.get("active_workflow_id") or active_workflow_id.get()
+         agent_id = kwargs.get("active_agent_id") or active_agent_id.get()
+         
+         record_llm_usage(
+             workflow_id=workflow_id,
+             agent_id=agent_id,
+             provider="groq",
+             model=response.model,
+             tokens_prompt=prompt_tokens,
+             tokens_completion=completion_tokens
+         )
+    except Exception as e:
+        logger.warning(f"Failed to record usage: {e}")
+
 @rate_limit_groq
 @retry_with_backoff(
     max_attempts=3,
@@ -91,7 +219,7 @@ def call_groq_sync(
     circuit_breaker = get_circuit_breaker("groq_api", failure_threshold=5, recovery_timeout=60)
     
     def _execute_request():
-        client = Groq(api_key=settings.GROQ_API_KEY)
+        client = _get_client()
         response = client.chat.completions.create(
             model=model or settings.GROQ_MODEL,
             messages=[
@@ -102,29 +230,7 @@ def call_groq_sync(
             **kwargs
         )
         
-        # Extract usage
-        try:
-             # Basic usage info from Groq response
-             usage = response.usage
-             prompt_tokens = usage.prompt_tokens if usage else 0
-             completion_tokens = usage.completion_tokens if usage else 0
-             
-             # Context extraction - we might need to pass this in kwargs or inspect stack
-             # For now, we rely on kwargs having identifiers if passed, or default to None
-             workflow_id = kwargs.get("active_workflow_id")
-             agent_id = kwargs.get("active_agent_id")
-             
-             record_llm_usage(
-                 workflow_id=workflow_id,
-                 agent_id=agent_id,
-                 provider="groq",
-                 model=response.model,
-                 tokens_prompt=prompt_tokens,
-                 tokens_completion=completion_tokens
-             )
-        except Exception as e:
-            logger.warning(f"Failed to record usage: {e}")
-
+        _record_usage(response, kwargs)
         return response.choices[0].message.content
 
     try:
@@ -137,18 +243,62 @@ def call_groq_sync(
     except Exception as e:
         logger.error(f"Error calling Groq API: {str(e)}")
         raise
+@retry_with_backoff(
+    max_attempts=3,
+    initial_delay=1.0,
+    retry_on=[Exception],
+    jitter=True
+)
+async def acall_groq(
+    prompt: str,
+    model: Optional[str] = None,
+    temperature: float = 0.7,
+    max_tokens: int = 2000,
+    **kwargs
+) -> str:
+    """
+    Async counterpart of call_groq_sync. Waiting for a rate-limit slot
+    suspends only the calling task, not the event loop or other callers.
+    """
+    if not settings.GROQ_API_KEY:
+        raise ValueError("GROQ_API_KEY is not set in settings.")
+    
+    circuit_breaker = get_circuit_breaker("groq_api", failure_threshold=5, recovery_timeout=60)
+    await _acquire_rate_slot()
+    
+    async def _execute_request():
+        response = await _get_async_client().chat.completions.create(
+            model=model or settings.GROQ_MODEL,
+            messages=[
+                {"role": "user", "content": prompt}
+            ],
+            temperature=temperature,
+            max_tokens=max_tokens,
+            **kwargs
+        )
+        _record_usage(response, kwargs)
+        return response.choices[0].message.content
+
+    try:
+        return await circuit_breaker.acall(_execute_request)
+        
+    except CircuitBreakerOpenException as e:
+        logger.error(f"Groq Circuit Breaker OPEN: {e}")
+        raise 
+    except Exception as e:
+        logger.error(f"Error calling Groq API: {str(e)}")
+        raise
+
 def get_groq_stats() -> Dict[str, Any]:
     """
     Returns current rate limit statistics.
     """
-    global _request_timestamps
-    
-    current_time = time.time()
-    # Clean up old timestamps for accurate count
-    _request_timestamps = [t for t in _request_timestamps if current_time - t < 60]
+    with _rate_limit_lock:
+        # Clean up old timestamps for accurate count
+        _prune_timestamps(time.time())
+        requests_in_last_minute = len(_request_timestamps)
     
     rate_limit = getattr(settings, "GROQ_RATE_LIMIT", 70)
-    requests_in_last_minute = len(_request_timestamps)
     remaining_requests = max(0, rate_limit - requests_in_last_minute)
     
     return {
@@ -157,10 +307,11 @@ def get_groq_stats() -> Dict[str, Any]:
         "rate_limit": rate_limit
     }
 
-@functools.lru_cache(maxsize=100)
-def _cached_groq_call(prompt_hash: str, prompt: str) -> str:
+@functools.lru_cache(maxsize=256)
+def _cached_groq_call(prompt: str) -> str:
     """
-    Internal cached helper.
+    Internal cached helper. Keyed on the prompt itself; str caches its own
+    hash, so no separate digest is needed.
     """
     return call_groq_sync(prompt)
 
@@ -168,6 +319,4 @@ def call_with_cache(prompt: str) -> str:
     """
     Public function to call Groq with LRU caching.
     """
-    # Create stable hash of the prompt
-    prompt_hash = hashlib.md5(prompt.encode("utf-8")).hexdigest()
-    return _cached_groq_call(prompt_hash, prompt)
+    return _cached_groq_call(prompt)
@@ -0,0 +1,26 @@
+"""
+Prompt construction helpers for the agent nodes.
+
+Static instruction blocks are sent as a leading system message so that the
+provider-side prefix cache can serve them across calls; only the trailing
+human message carries per-request fields.
+"""
+from langchain_core.messages import SystemMessage
+from langchain_core.prompts import ChatPromptTemplate
+
+# Anthropic-style cache hint. Groq caches identical prefixes automatically and
+# ignores the hint; providers that honour it will cache the system block.
+CACHE_CONTROL = {"type": "ephemeral"}
+
+
+def build_cached_prompt(system_prefix: str, human_template: str) -> ChatPromptTemplate:
+    """
+    Build a chat prompt with a byte-identical system prefix.
+
+    The system prefix is passed as a literal message (not a template), so it is
+    never interpolated and stays identical between invocations.
+    """
+    return ChatPromptTemplate.from_messages([
+        SystemMessage(content=system_prefix, additional_kwargs={"cache_control": CACHE_CONTROL}),
+        ("human", human_template),
+    ])
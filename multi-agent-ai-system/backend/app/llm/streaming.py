@@ -0,0 +1,69 @@
+"""
+Token streaming for agent LLM calls.
+
+Chunks are forwarded as workflow.output.delta events tagged with the emitting
+agent, so clients can render an answer from the first token. Each event is a
+synchronous publish, so tokens are coalesced into one delta per
+DELTA_FLUSH_INTERVAL or DELTA_FLUSH_CHARS, whichever comes first.
+"""
+import time
+from typing import Optional
+
+from app.cache.llm_cache import make_cache_key, aget_cached_response, aset_cached_response
+from app.observability.events import emit_workflow_event, EventType
+
+DELTA_FLUSH_INTERVAL = 0.05  # seconds
+DELTA_FLUSH_CHARS = 256
+
+
+def emit_output_delta(run_id: Optional[str], agent_name: str, delta: str) -> None:
+    if run_id:
+        emit_workflow_event(
+            run_id=run_id,
+            event_type=EventType.WORKFLOW_OUTPUT_DELTA,
+            agent_name=agent_name,
+            payload={"delta": delta}
+        )
+
+
+async def stream_completion(
+    chain,
+    inputs: dict,
+    run_id: Optional[str],
+    agent_name: str,
+    template_id: str,
+    config: Optional[dict] = None
+) -> str:
+    """
+    Streams a chain's output as delta events and returns the full text.
+    Goes through the exact-match LLM cache; a cached response is emitted as a
+    single delta.
+    """
+    cache_key = make_cache_key(template_id, inputs)
+    cached = await aget_cached_response(cache_key)
+    if cached is not None:
+        emit_output_delta(run_id, agent_name, cached)
+        return cached
+
+    parts = []
+    pending = []
+    pending_chars = 0
+    last_flush = time.monotonic()
+    async for chunk in chain.astream(inputs, config=config):
+        if not chunk.content:
+            continue
+        parts.append(chunk.content)
+        pending.append(chunk.content)
+        pending_chars += len(chunk.content)
+        now = time.monotonic()
+        if pending_chars >= DELTA_FLUSH_CHARS or now - last_flush >= DELTA_FLUSH_INTERVAL:
+            emit_output_delta(run_id, agent_name, "".join(pending))
+            pending.clear()
+            pending_chars = 0
+            last_flush = now
+    if pending:
+        emit_output_delta(run_id, agent_name, "".join(pending))
+
+    content = "".join(parts)
+    await aset_cached_response(cache_key, content)
+    return content
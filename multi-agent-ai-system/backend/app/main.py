@@ -2,10 +2,12 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
+import asyncio
 import logging
 
 from app.config import settings
-from app.database import init_db
+from sqlalchemy import text
+from app.database import init_db, get_async_sessionmaker
 from app.routers import workflows, runs, logs, auth, history
 
 # Configure logging
@@ -32,6 +34,9 @@ async def lifespan(app: FastAPI):
     await shadow_agent.stop()
     from app.queue.producer import close_connection
     await close_connection()
+    from app.llm.groq_client import close_groq_client, aclose_groq_client
+    await asyncio.to_thread(close_groq_client)
+    await aclose_groq_client()
     logger.info("Shutting down application")
 
 app = FastAPI(
@@ -73,6 +78,21 @@ async def health_check():
         "environment": settings.ENVIRONMENT
     }
 
+@app.get("/health/db")
+async def database_health_check():
+    """Round-trip the database and report connection pool usage."""
+    session_factory = get_async_sessionmaker()
+    try:
+        async with session_factory() as db:
+            await db.execute(text("SELECT 1"))
+    except Exception as e:
+        logger.error(f"Database health check failed: {e}")
+        return JSONResponse(status_code=503, content={"status": "unhealthy"})
+    return {
+        "status": "healthy",
+        "pool": session_factory.kw["bind"].pool.status()
+    }
+
 # Include API routers
 app.include_router(
     workflows.router,
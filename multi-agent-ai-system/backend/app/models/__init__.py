@@ -5,9 +5,9 @@ from .workflow import Workflow
 from .log import Log
 from .message import Message
 from .run import WorkflowRun
-from app.costs.models import CostRecord
+from app.costs.models import CostRecord, CostRollup
 from app.auth.models import User
 from app.models.checkpoint import Checkpoint, CheckpointWrite, CheckpointBlob
 from app.eval.store import EvaluationRun, EvaluationResult
 
-__all__ = ["Base", "Workflow", "Log", "Message", "WorkflowRun", "CostRecord", "User", "Checkpoint", "CheckpointWrite", "CheckpointBlob", "EvaluationRun", "EvaluationResult"]
+__all__ = ["Base", "Workflow", "Log", "Message", "WorkflowRun", "CostRecord", "CostRollup", "User", "Checkpoint", "CheckpointWrite", "CheckpointBlob", "EvaluationRun", "EvaluationResult"]
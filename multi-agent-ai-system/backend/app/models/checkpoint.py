@@ -1,6 +1,6 @@
 from sqlalchemy import Column, String, LargeBinary, Integer, ForeignKey
-from sqlalchemy.orm import Mapped, mapped_column
-from typing import Optional
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from typing import List, Optional
 
 from app.models.base import Base, TimestampMixin
 
@@ -18,6 +18,13 @@ class Checkpoint(Base, TimestampMixin):
     checkpoint: Mapped[bytes] = mapped_column(LargeBinary)
     metadata_: Mapped[bytes] = mapped_column("metadata", LargeBinary)
 
+    # Pending writes for this checkpoint (no FK; joined on the shared key)
+    writes: Mapped[List["CheckpointWrite"]] = relationship(
+        primaryjoin="and_(Checkpoint.thread_id == foreign(CheckpointWrite.thread_id), "
+                    "Checkpoint.checkpoint_id == foreign(CheckpointWrite.checkpoint_id))",
+        viewonly=True,
+    )
+
     # Optional: index for cleanup
     # __table_args__ = (
     #     Index("idx_checkpoints_thread_id", "thread_id"),
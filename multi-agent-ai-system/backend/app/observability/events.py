@@ -23,6 +23,7 @@ class EventType(str, Enum):
     WORKFLOW_COMPLETED = "workflow.completed"
     WORKFLOW_FAILED = "workflow.failed"
     WORKFLOW_COST_UPDATE = "workflow.cost.update"
+    WORKFLOW_OUTPUT_DELTA = "workflow.output.delta"
 
 
 import asyncio
@@ -107,8 +108,9 @@ class WorkflowEventEmitter:
             "payload": payload or {}
         }
         
-        # Log event for debugging
-        logger.info(f"Event: {event_type.value} for run {run_id[:8]}... (agent: {agent_name}, progress: {progress}%)")
+        # Log event for debugging; output deltas are too frequent to log
+        if event_type != EventType.WORKFLOW_OUTPUT_DELTA:
+            logger.info(f"Event: {event_type.value} for run {run_id[:8]}... (agent: {agent_name}, progress: {progress}%)")
         
         # 1. Try Redis first
         if self._redis_available and self.redis_client:
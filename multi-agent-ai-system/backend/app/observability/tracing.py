@@ -9,11 +9,13 @@ import os
 import logging
 from typing import Optional
 from contextlib import contextmanager
+from contextvars import ContextVar
 
 try:
     from opentelemetry import trace
     from opentelemetry.sdk.trace import TracerProvider
     from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
     from opentelemetry.exporter.jaeger.thrift import JaegerExporter
     from opentelemetry.sdk.resources import Resource, SERVICE_NAME
     from opentelemetry.trace import Status, StatusCode, Tracer
@@ -38,7 +40,7 @@ except ImportError:
         def add_span_processor(self, processor): pass
         
     class BatchSpanProcessor:
-        def __init__(self, exporter): pass
+        def __init__(self, exporter, **kwargs): pass
         
     class JaegerExporter:
         def __init__(self, agent_host_name, agent_port): pass
@@ -64,11 +66,29 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Identity of the workflow/agent currently executing, set by the traced agent
+# wrappers and read by cost tracking. Propagates into asyncio.to_thread calls.
+active_workflow_id: ContextVar[Optional[str]] = ContextVar("active_workflow_id", default=None)
+active_agent_id: ContextVar[Optional[str]] = ContextVar("active_agent_id", default=None)
+
 # Global tracer provider
 _tracer_provider: Optional[TracerProvider] = None
 _tracing_configured = False
 
 
+def _batch_span_processor(exporter) -> BatchSpanProcessor:
+    """
+    Wrap an exporter in a BatchSpanProcessor so span end only enqueues;
+    serialization and export happen on the processor's worker thread.
+    """
+    return BatchSpanProcessor(
+        exporter,
+        max_queue_size=int(os.getenv("TRACING_BATCH_MAX_QUEUE_SIZE", "2048")),
+        schedule_delay_millis=int(os.getenv("TRACING_BATCH_SCHEDULE_DELAY_MS", "500")),
+        max_export_batch_size=int(os.getenv("TRACING_BATCH_MAX_EXPORT_SIZE", "512")),
+    )
+
+
 def configure_tracing():
     """
     Configure OpenTelemetry tracing with Jaeger exporter.
@@ -77,8 +97,12 @@ def configure_tracing():
     - TRACING_ENABLED: Enable/disable tracing (default: true)
     - TRACING_EXPORTER: Exporter type (default: jaeger)
     - TRACING_SERVICE_NAME: Service name (default: multi-agent-ai-system)
+    - TRACING_SAMPLE_RATE: Fraction of new traces recorded, 0.0-1.0 (default: 1.0)
     - JAEGER_AGENT_HOST: Jaeger agent host (default: localhost)
     - JAEGER_AGENT_PORT: Jaeger agent port (default: 6831)
+    - TRACING_BATCH_MAX_QUEUE_SIZE: Spans buffered before dropping (default: 2048)
+    - TRACING_BATCH_SCHEDULE_DELAY_MS: Delay between batch exports (default: 500)
+    - TRACING_BATCH_MAX_EXPORT_SIZE: Spans per export call (default: 512)
     
     Safe Failure: If configuration fails, tracing is disabled but app continues.
     """
@@ -109,8 +133,14 @@ def configure_tracing():
             SERVICE_NAME: service_name
         })
         
+        # Head-based sampling: the root span decides, child spans follow it
+        sample_rate = float(os.getenv("TRACING_SAMPLE_RATE", "1.0"))
+        
         # Create tracer provider
-        _tracer_provider = TracerProvider(resource=resource)
+        _tracer_provider = TracerProvider(
+            resource=resource,
+            sampler=ParentBased(TraceIdRatioBased(sample_rate))
+        )
         
         # Configure exporter
         if exporter_type == "jaeger":
@@ -123,7 +153,7 @@ def configure_tracing():
             )
             
             # Use batch processor for async export
-            span_processor = BatchSpanProcessor(jaeger_exporter)
+            span_processor = _batch_span_processor(jaeger_exporter)
             _tracer_provider.add_span_processor(span_processor)
             
             logger.info(f"Jaeger tracing configured: {jaeger_host}:{jaeger_port}")
@@ -131,7 +161,7 @@ def configure_tracing():
         elif exporter_type == "console":
             from opentelemetry.sdk.trace.export import ConsoleSpanExporter
             console_exporter = ConsoleSpanExporter()
-            span_processor = BatchSpanProcessor(console_exporter)
+            span_processor = _batch_span_processor(console_exporter)
             _tracer_provider.add_span_processor(span_processor)
             logger.info("Console tracing configured")
         
@@ -183,6 +213,18 @@ def get_tracer(service_name: str) -> Tracer:
     return trace.get_tracer(service_name)
 
 
+def get_current_span():
+    """
+    Get the span active in the current context.
+    
+    Returns:
+        Span instance, or None if tracing is disabled
+    """
+    if not is_tracing_enabled():
+        return None
+    return trace.get_current_span()
+
+
 @contextmanager
 def trace_span(
     tracer: Tracer,
@@ -214,8 +256,8 @@ def trace_span(
     
     try:
         with tracer.start_as_current_span(span_name) as span:
-            # Set attributes if provided
-            if attributes:
+            # Set attributes if provided (skipped for unsampled spans)
+            if attributes and span.is_recording():
                 for key, value in attributes.items():
                     span.set_attribute(key, value)
             
@@ -241,7 +283,7 @@ def set_span_error(span, error: Exception):
         span: Span instance
         error: Exception that occurred
     """
-    if span and is_tracing_enabled():
+    if span and span.is_recording():
         try:
             span.set_status(Status(StatusCode.ERROR, str(error)))
             span.record_exception(error)
@@ -257,7 +299,7 @@ def add_span_attributes(span, attributes: dict):
         span: Span instance
         attributes: Dictionary of attributes to add
     """
-    if span and is_tracing_enabled():
+    if span and span.is_recording():
         try:
             for key, value in attributes.items():
                 span.set_attribute(key, value)
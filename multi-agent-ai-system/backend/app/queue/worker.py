@@ -316,6 +316,11 @@ async def main():
         logger.error(f"Mapper configuration failed: {e}")
         # Continue anyway - the error might be non-fatal
     
+    # The coder node runs here, so pre-warm its sandbox pool before taking
+    # tasks; it is closed by an atexit hook in app.agents.coder
+    from app.agents.coder import _get_sandbox
+    await asyncio.to_thread(_get_sandbox)
+    
     logger.info("Starting Worker...")
     while True:
         try:
@@ -430,3 +430,22 @@ def get_redis_client():
         logger.warning(f"Failed to get Redis client: {e}")
         return None
 
+
+def get_async_redis_client():
+    """
+    Get an asyncio Redis client for consumers running on the event loop.
+    Returns None if Redis is not configured.
+    """
+    from .config import load_rate_limit_config
+    config = load_rate_limit_config()
+    
+    if not config.redis_url:
+        return None
+    
+    try:
+        import redis.asyncio
+        return redis.asyncio.from_url(config.redis_url, decode_responses=True)
+    except Exception as e:
+        logger.warning(f"Failed to get async Redis client: {e}")
+        return None
+
@@ -1,7 +1,10 @@
+import atexit
 import sqlite3
-import json
+import orjson
 import time
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, Optional
 from app.config import settings
 from app.observability.tracing import get_tracer, trace_span
@@ -39,7 +42,7 @@ def save_checkpoint(workflow_id: str, step: str, state: Dict[str, Any]):
     """
     try:
         # Basic serialization - user should ensure state is serializable
-        serialized_state = json.dumps(state, default=str)
+        serialized_state = orjson.dumps(state, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
         
         with trace_span(tracer, "checkpoint.save", attributes={"workflow.id": workflow_id, "checkpoint.step": step}):
             conn = sqlite3.connect(DB_PATH)
@@ -58,6 +61,51 @@ def save_checkpoint(workflow_id: str, step: str, state: Dict[str, Any]):
         # We generally don't want checkpointing to crash the workflow
         pass
 
+# Background writer for enqueue_checkpoint. Pending snapshots are keyed by
+# workflow, so a workflow that moves on before its last write lands only has
+# its newest snapshot persisted.
+_pending: Dict[str, tuple] = {}
+_pending_lock = threading.Lock()
+_drain_scheduled = False
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="checkpoint")
+
+# Top-level state values kept in queued snapshots; anything else (clients,
+# generators, DB handles) is dropped rather than stringified
+_JSON_SAFE = (str, int, float, bool, list, dict, type(None))
+
+def _drain_checkpoints():
+    global _drain_scheduled
+    while True:
+        with _pending_lock:
+            if not _pending:
+                _drain_scheduled = False
+                return
+            workflow_id, (step, state) = _pending.popitem()
+        save_checkpoint(workflow_id, step, state)
+
+def enqueue_checkpoint(workflow_id: str, step: str, state: Dict[str, Any]):
+    """
+    Queue a checkpoint to be saved off the caller's thread, replacing any
+    snapshot still pending for the same workflow. Only JSON-safe top-level
+    values of `state` are kept.
+    """
+    global _drain_scheduled
+    safe_state = {k: v for k, v in state.items() if isinstance(v, _JSON_SAFE)}
+    with _pending_lock:
+        _pending[workflow_id] = (step, safe_state)
+        if _drain_scheduled:
+            return
+        _drain_scheduled = True
+    _writer.submit(_drain_checkpoints)
+
+def flush_checkpoints():
+    """Block until every queued checkpoint has been written."""
+    _writer.submit(_drain_checkpoints).result()
+
+# The executor's workers are joined before atexit handlers run; anything
+# queued after that is written inline here.
+atexit.register(_drain_checkpoints)
+
 def load_last_checkpoint(workflow_id: str) -> Optional[Dict[str, Any]]:
     """
     Load the most recent checkpoint for a workflow.
@@ -76,7 +124,7 @@ def load_last_checkpoint(workflow_id: str) -> Optional[Dict[str, Any]]:
             step, state_str, timestamp = row
             return {
                 "step": step,
-                "state": json.loads(state_str),
+                "state": orjson.loads(state_str),
                 "timestamp": timestamp
             }
         return None
@@ -56,6 +56,20 @@ class CircuitBreaker:
                 self._on_failure()
             raise e
 
+    async def acall(self, func, *args, **kwargs):
+        """
+        Awaits the coroutine function wrapped in circuit breaker logic.
+        """
+        self._before_call()
+        try:
+            result = await func(*args, **kwargs)
+            self._on_success()
+            return result
+        except Exception as e:
+            if self._is_exception_relevant(e):
+                self._on_failure()
+            raise e
+
     def _is_exception_relevant(self, exception: Exception) -> bool:
         return any(isinstance(exception, exc_type) for exc_type in self.expected_exceptions)
 
@@ -10,7 +10,7 @@ from datetime import datetime, timedelta, timezone
 
 from huey import SqliteHuey, crontab
 from app.config import settings
-from app.database import SessionLocal
+from app.database import SessionLocal, unpooled_async_session
 from app.models.run import WorkflowRun, RunStatus
 from app.models.message import Message, MessageRole
 from app.agents.graph import create_multi_agent_workflow
@@ -26,7 +26,7 @@ logger = logging.getLogger(__name__)
 # Initialize Huey
 # Use absolute path to ensure single source of truth
 import os
-BASE_DIR = r"C:\Users\HP\Documents\antigravity\multi-agent-ai-system\backend"
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 huey = SqliteHuey(
     filename=os.path.join(BASE_DIR, "huey.db"),
     name="multi_agent_workflows",
@@ -38,6 +38,33 @@ huey = SqliteHuey(
 )
 
 
+@huey.on_startup()
+def _warm_sandbox():
+    """Pre-start the coder's sandbox pool in the consumer process."""
+    from app.agents.coder import _get_sandbox
+    _get_sandbox()
+
+
+@huey.on_shutdown()
+def _close_sandbox():
+    """Remove the pooled sandbox containers when the consumer stops."""
+    from app.agents.coder import close_sandbox
+    close_sandbox()
+
+
+def _create_review_request(**kwargs) -> None:
+    """Open a HITL review request from sync task code via the async service."""
+    async def _create():
+        async with unpooled_async_session() as db:
+            async with ReviewQueueService(db) as review_service:
+                await review_service.create_review_request(**kwargs)
+
+    import concurrent.futures
+    # Run in a separate thread to avoid event loop conflicts
+    with concurrent.futures.ThreadPoolExecutor() as pool:
+        pool.submit(asyncio.run, _create()).result()
+
+
 @huey.task(retry=False)
 def execute_workflow_task(
     run_id: str,
@@ -144,15 +171,14 @@ def execute_workflow_task(
             gate = get_gate_for_step(next_step)
             if gate:
                 # Create Review Request
-                with ReviewQueueService(db) as review_service:
-                    review_service.create_review_request(
-                        workflow_id=workflow_id,
-                        run_id=run_id,
-                        thread_id=run_id, # Using run_id as thread_id
-                        step_name=next_step,
-                        gate=gate,
-                        snapshot_id=snapshot.config['configurable'].get('checkpoint_id')
-                    )
+                _create_review_request(
+                    workflow_id=workflow_id,
+                    run_id=run_id,
+                    thread_id=run_id, # Using run_id as thread_id
+                    step_name=next_step,
+                    gate=gate,
+                    snapshot_id=snapshot.config['configurable'].get('checkpoint_id')
+                )
                 
                 # Update Run Status to PAUSED (or equivalent)
                 # Since we don't have PAUSED status yet, we keep it as RUNNING or add new status
@@ -298,14 +324,13 @@ def resume_workflow_task(run_id: str):
             next_step = snapshot.next[0]
             gate = get_gate_for_step(next_step)
             if gate:
-                 with ReviewQueueService(db) as review_service:
-                    review_service.create_review_request(
-                        workflow_id=run.workflow_id,
-                        run_id=run_id,
-                        thread_id=run_id,
-                        step_name=next_step,
-                        gate=gate
-                    )
+                 _create_review_request(
+                    workflow_id=run.workflow_id,
+                    run_id=run_id,
+                    thread_id=run_id,
+                    step_name=next_step,
+                    gate=gate
+                 )
                  return 
 
         if hasattr(snapshot, "values") and snapshot.values:
@@ -3,9 +3,13 @@ Quick script to create evaluation tables in the database.
 Run this once to set up the evaluation harness tables.
 """
 from app.database import engine
-from app.eval.store import Base
+from app.eval.store import Base, EvaluationResult
 
 # Create all tables defined in the eval module
 Base.metadata.create_all(bind=engine)
 
+# create_all skips existing tables, so add indexes introduced since then
+for index in EvaluationResult.__table__.indexes:
+    index.create(bind=engine, checkfirst=True)
+
 print("✅ Evaluation tables created successfully!")
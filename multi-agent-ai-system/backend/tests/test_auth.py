@@ -1,4 +1,5 @@
 import pytest
+from unittest.mock import patch
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
@@ -8,6 +9,7 @@ from app.database import get_db
 from app.models.base import Base # Import Base from models.base, ensuring app.models is imported in main or here to register User
 import app.models # Register all models
 from app.main import app
+from app.auth.models import User
 
 # Setup in-memory DB for testing
 SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
@@ -89,3 +91,42 @@ def test_unauthorized_access():
     response = client.get("/api/v1/workflows")
     # Should be 401 because we protected it
     assert response.status_code == 401
+
+def test_get_me_reuses_verified_token():
+    login_res = client.post(
+        "/api/v1/auth/token",
+        data={"username": "test@example.com", "password": "password123"},
+    )
+    token = login_res.json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/api/v1/auth/users/me", headers=headers).status_code == 200
+
+    with patch("app.auth.deps.jwt.decode") as decode:
+        response = client.get("/api/v1/auth/users/me", headers=headers)
+    decode.assert_not_called()
+    assert response.status_code == 200
+    assert response.json()["email"] == "test@example.com"
+
+def test_cached_token_survives_user_recreated_with_same_email():
+    user = {"email": "recreated@example.com", "password": "password123", "full_name": "Recreated"}
+    client.post("/api/v1/auth/register", json=user)
+    token = client.post(
+        "/api/v1/auth/token",
+        data={"username": user["email"], "password": user["password"]},
+    ).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/api/v1/auth/users/me", headers=headers).status_code == 200
+
+    # Recreate the account; a token for the same email (issued in the same
+    # second) is byte-identical, but the cache still holds the old id
+    db = TestingSessionLocal()
+    try:
+        db.query(User).filter_by(email=user["email"]).delete()
+        db.commit()
+    finally:
+        db.close()
+    new_id = client.post("/api/v1/auth/register", json=user).json()["id"]
+
+    response = client.get("/api/v1/auth/users/me", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["id"] == new_id
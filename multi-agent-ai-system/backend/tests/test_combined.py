@@ -0,0 +1,70 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.agents.combined import combined_node
+from app.agents.graph import should_continue_after_plan
+from app.cache.llm_cache import clear_memory_cache
+
+@pytest.fixture
+def mock_structured_chain():
+    clear_memory_cache()
+    with patch("app.agents.combined.get_shared_chat_llm"), \
+         patch("app.agents.combined.COMBINED_PROMPT") as mock_prompt:
+        chain = MagicMock()
+        chain.ainvoke = AsyncMock(return_value={
+            "execution_notes": "Synthesized 3 sources.",
+            "final_output": "The answer."
+        })
+        mock_prompt.__or__.return_value = chain
+        yield chain
+
+def test_route_after_plan_fuses_non_code_requests():
+    assert should_continue_after_plan({"input": "Compare solar and wind power"}) == "combined"
+    assert should_continue_after_plan({"input": "Write a script to scrape prices"}) == ["executor", "coder"]
+    # Approval gates force the sequential path, never fusion or fan-out
+    assert should_continue_after_plan({"input": "Compare solar and wind"}, gated=True) == "executor"
+    assert should_continue_after_plan({"input": "Write a script to scrape prices"}, gated=True) == "executor"
+    assert should_continue_after_plan({"input": "anything", "mode": "plan_only"}) == "finalizer"
+
+def test_gated_graph_pauses_before_each_gated_node():
+    from langgraph.checkpoint.memory import MemorySaver
+    from app.agents import graph as graph_module
+
+    def stub(update):
+        return lambda state: update
+
+    stubs = {
+        "research_node": stub({"query_complexity": "COMPLEX"}),
+        "planner_node": stub({"plan_data": {"steps": []}}),
+        "executor_node": stub({"execution_data": "notes"}),
+        "coder_node": stub({"code_data": "print('hi')"}),
+        "finalizer_node": stub({"final_output": "done"}),
+        "combined_node": stub({}),
+    }
+    with patch.multiple(graph_module, **stubs):
+        workflow = graph_module.create_graph(
+            checkpointer=MemorySaver(), interrupt_before=["executor", "coder"]
+        )
+    config = {"configurable": {"thread_id": "gated"}}
+
+    workflow.invoke({"input": "Write a script", "mode": "full"}, config)
+    assert workflow.get_state(config).next == ("executor",)
+
+    # Approving the executor must not also run the coder
+    workflow.invoke(None, config)
+    assert workflow.get_state(config).next == ("coder",)
+
+    workflow.invoke(None, config)
+    assert workflow.get_state(config).values["final_output"] == "done"
+
+def test_combined_node_single_call(mock_structured_chain):
+    state = {"input": "Compare solar and wind power", "research_data": "Findings", "plan_data": {"steps": []}}
+
+    result = asyncio.run(combined_node(state))
+
+    assert result == {"execution_data": "Synthesized 3 sources.", "code_data": None, "final_output": "The answer."}
+    mock_structured_chain.ainvoke.assert_called_once()
+
+    # Identical inputs are served from the cache
+    asyncio.run(combined_node(state))
+    mock_structured_chain.ainvoke.assert_called_once()
@@ -0,0 +1,67 @@
+import pytest
+from unittest.mock import patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.costs import buffer, tracker
+from app.costs.models import CostRecord, CostRollup
+from app.costs.tracker import record_llm_usage
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    CostRecord.__table__.create(engine)
+    CostRollup.__table__.create(engine)
+    factory = sessionmaker(bind=engine)
+    with patch.object(buffer, "SessionLocal", factory), \
+         patch.object(tracker, "SessionLocal", factory), \
+         patch.object(buffer, "_ensure_worker"), \
+         patch.object(tracker, "COST_PERSIST_MODE", "each"):
+        yield factory
+
+def test_usage_is_buffered_until_flush(session_factory):
+    for _ in range(3):
+        record_llm_usage(workflow_id="wf-1", agent_id="planner", tokens_prompt=10, tokens_completion=5)
+
+    db = session_factory()
+    assert db.query(CostRecord).count() == 0
+
+    buffer.flush_cost_records()
+    rows = db.query(CostRecord).all()
+    assert len(rows) == 3
+    assert all(r.tokens_total == 15 and r.timestamp is not None for r in rows)
+
+def test_full_batch_wakes_writer(session_factory):
+    with patch.object(buffer, "FLUSH_BATCH_SIZE", 2), patch.object(buffer._wakeup, "set") as wake:
+        record_llm_usage(workflow_id="wf-2")
+        wake.assert_not_called()
+        record_llm_usage(workflow_id="wf-2")
+        wake.assert_called_once()
+    buffer.flush_cost_records()
+
+def test_flush_updates_rollup_totals(session_factory):
+    record_llm_usage(workflow_id="wf-3", agent_id="planner", tokens_prompt=10, tokens_completion=5)
+    buffer.flush_cost_records()
+    record_llm_usage(workflow_id="wf-3", agent_id="planner", tokens_prompt=20, tokens_completion=5)
+    record_llm_usage(workflow_id="wf-3", agent_id="coder", tokens_prompt=100, tokens_completion=0)
+
+    summary = tracker.get_cost_summary_by_workflow("wf-3")
+    assert summary["total_tokens"] == 140
+    assert tracker.get_cost_summary_by_agent("planner")["total_tokens"] == 40
+    assert session_factory().query(CostRollup).count() == 2
+
+def test_aggregate_mode_skips_per_call_rows(session_factory):
+    with patch.object(tracker, "COST_PERSIST_MODE", "aggregate"):
+        record_llm_usage(workflow_id="wf-4", agent_id="planner", tokens_prompt=10, tokens_completion=5)
+        record_llm_usage(workflow_id="wf-4", agent_id="planner", tokens_prompt=10, tokens_completion=5)
+
+    assert tracker.get_cost_summary_by_workflow("wf-4")["total_tokens"] == 30
+    assert session_factory().query(CostRecord).count() == 0
+
+def test_rebuild_refused_in_aggregate_mode(session_factory):
+    with patch.object(tracker, "COST_PERSIST_MODE", "aggregate"):
+        record_llm_usage(workflow_id="wf-5", agent_id="planner", tokens_prompt=10, tokens_completion=5)
+        with pytest.raises(RuntimeError):
+            tracker.rebuild_cost_rollup()
+
+    assert tracker.get_cost_summary_by_workflow("wf-5")["total_tokens"] == 15
@@ -1,5 +1,6 @@
+import asyncio
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 import time
 from app.llm import groq_client
 from app.config import settings
@@ -7,7 +8,8 @@ from app.config import settings
 # Mock the Groq client
 @pytest.fixture
 def mock_groq():
-    with patch("app.llm.groq_client.Groq") as mock:
+    with patch("app.llm.groq_client.Groq") as mock, \
+         patch.object(groq_client, "_GROQ_CLIENT", None):
         yield mock
 
 @pytest.fixture
@@ -33,6 +35,42 @@ def test_get_groq_llm_no_key():
     with pytest.raises(ValueError, match="GROQ_API_KEY is not set"):
         groq_client.get_groq_llm()
 
+def test_get_shared_chat_llm_reuses_instance(mock_chat_groq):
+    settings.GROQ_API_KEY = "test_key"
+    groq_client._get_sync_chat_llm.cache_clear()
+    
+    try:
+        llm1 = groq_client.get_shared_chat_llm(request_timeout=60)
+        llm2 = groq_client.get_shared_chat_llm(request_timeout=60)
+        
+        assert llm1 is llm2
+        mock_chat_groq.assert_called_once()
+    finally:
+        groq_client._get_sync_chat_llm.cache_clear()
+
+def test_get_shared_chat_llm_is_scoped_per_event_loop():
+    settings.GROQ_API_KEY = "test_key"
+    
+    with patch("app.llm.groq_client.ChatGroq", side_effect=lambda **kw: MagicMock()):
+        async def get_twice():
+            llm = groq_client.get_shared_chat_llm(request_timeout=60)
+            assert groq_client.get_shared_chat_llm(request_timeout=60) is llm
+            return llm
+        
+        # Each asyncio.run (as in the Huey tasks) gets its own instance, so no
+        # client bound to an already-closed loop is reused
+        assert asyncio.run(get_twice()) is not asyncio.run(get_twice())
+
+def test_call_groq_sync_reuses_client(mock_groq):
+    settings.GROQ_API_KEY = "test_key"
+    mock_groq.return_value.chat.completions.create.return_value.choices[0].message.content = "ok"
+    
+    groq_client.call_groq_sync("First prompt")
+    groq_client.call_groq_sync("Second prompt")
+    
+    mock_groq.assert_called_once()
+    assert mock_groq.return_value.chat.completions.create.call_count == 2
+
 def test_call_groq_sync_success(mock_groq):
     settings.GROQ_API_KEY = "test_key"
     
@@ -50,7 +88,7 @@ def test_call_groq_sync_success(mock_groq):
 
 def test_rate_limiter():
     # Reset timestamps
-    groq_client._request_timestamps = []
+    groq_client._request_timestamps.clear()
     
     # Set limit to 2 per minute
     original_limit = settings.GROQ_RATE_LIMIT
@@ -70,6 +108,8 @@ def test_rate_limiter():
             groq_client.rate_limit_groq(lambda: None)()
             
             assert mock_sleep.call_count == 1
+            # ...for about a minute, until the 1st call leaves the window
+            assert 59 < mock_sleep.call_args.args[0] <= 60
     finally:
         settings.GROQ_RATE_LIMIT = original_limit
 
@@ -95,7 +135,8 @@ def test_caching(mock_groq):
     assert mock_instance.chat.completions.create.call_count == 1
 
 def test_get_groq_stats():
-    groq_client._request_timestamps = [time.time()] * 5
+    groq_client._request_timestamps.clear()
+    groq_client._request_timestamps.extend([time.time()] * 5)
     original_limit = settings.GROQ_RATE_LIMIT
     settings.GROQ_RATE_LIMIT = 10
     
@@ -107,3 +148,18 @@ def test_get_groq_stats():
         assert stats["rate_limit"] == 10
     finally:
         settings.GROQ_RATE_LIMIT = original_limit
+
+def test_acall_groq_success():
+    settings.GROQ_API_KEY = "test_key"
+    
+    with patch("app.llm.groq_client.AsyncGroq") as mock_async_groq:
+        mock_response = MagicMock()
+        mock_response.choices[0].message.content = "Async response"
+        mock_async_groq.return_value.chat.completions.create = AsyncMock(return_value=mock_response)
+        
+        async def call_twice():
+            return [await groq_client.acall_groq("Test prompt") for _ in range(2)]
+        
+        assert asyncio.run(call_twice()) == ["Async response", "Async response"]
+        # One client per event loop, reused across calls
+        mock_async_groq.assert_called_once()
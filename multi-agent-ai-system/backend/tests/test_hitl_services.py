@@ -0,0 +1,66 @@
+import asyncio
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+from app.hitl.decisions import DecisionService
+from app.hitl.gates import ApprovalGate
+from app.hitl.models import ReviewDecision, ReviewDecisionRecord, ReviewRequest, ReviewStatus
+from app.hitl.queue import ReviewQueueService
+
+@pytest.fixture
+def session_factory():
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+
+    async def create_tables():
+        async with engine.begin() as conn:
+            await conn.run_sync(ReviewRequest.__table__.create)
+            await conn.run_sync(ReviewDecisionRecord.__table__.create)
+
+    asyncio.run(create_tables())
+    return async_sessionmaker(engine, expire_on_commit=False)
+
+def test_review_request_lifecycle(session_factory):
+    async def scenario():
+        async with session_factory() as db:
+            async with ReviewQueueService(db) as queue:
+                req = await queue.create_review_request(
+                    workflow_id="wf-1", run_id="run-1", thread_id="run-1",
+                    step_name="executor", gate=ApprovalGate(step="executor")
+                )
+                assert [r.id for r in await queue.list_pending_reviews("wf-1")] == [req.id]
+                summary = await queue.list_pending_reviews_summary("wf-1")
+                assert [tuple(r) for r in summary] == [
+                    (req.id, "wf-1", "executor", req.risk_level, req.created_at)
+                ]
+
+            async with DecisionService(db) as service:
+                decided = await service.submit_decision(req.id, ReviewDecision.APPROVE, actor="admin")
+                assert decided.status == ReviewStatus.APPROVED
+                with pytest.raises(ValueError):
+                    await service.submit_decision(req.id, ReviewDecision.REJECT, actor="admin")
+
+            async with ReviewQueueService(db) as queue:
+                assert await queue.list_pending_reviews() == []
+
+    asyncio.run(scenario())
+
+def test_mark_expired_updates_only_overdue_pending(session_factory):
+    async def scenario():
+        async with session_factory() as db, ReviewQueueService(db) as queue:
+            overdue = await queue.create_review_request(
+                workflow_id="wf-1", run_id="run-1", thread_id="run-1",
+                step_name="executor", gate=ApprovalGate(step="executor", timeout_seconds=-60)
+            )
+            fresh = await queue.create_review_request(
+                workflow_id="wf-1", run_id="run-2", thread_id="run-2",
+                step_name="executor", gate=ApprovalGate(step="executor")
+            )
+
+            assert await queue.mark_expired() == 1
+            assert await queue.mark_expired() == 0
+            await db.refresh(overdue)
+            await db.refresh(fresh)
+            assert overdue.status == ReviewStatus.EXPIRED
+            assert fresh.status == ReviewStatus.PENDING
+
+    asyncio.run(scenario())
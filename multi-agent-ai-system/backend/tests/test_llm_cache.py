@@ -0,0 +1,60 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.cache import llm_cache
+from app.config import settings
+
+@pytest.fixture(autouse=True)
+def memory_cache():
+    # Force the in-process backend and a clean slate for each test
+    with patch("app.cache.llm_cache._get_redis", return_value=None):
+        llm_cache.clear_memory_cache()
+        yield
+        llm_cache.clear_memory_cache()
+
+def test_cache_key_ignores_input_order():
+    key1 = llm_cache.make_cache_key("coder", {"input": "a", "language": "python"})
+    key2 = llm_cache.make_cache_key("coder", {"language": "python", "input": "a"})
+    key3 = llm_cache.make_cache_key("executor", {"input": "a", "language": "python"})
+    
+    assert key1 == key2
+    assert key1 != key3
+
+def test_cached_invoke_hits_on_repeat():
+    chain = MagicMock()
+    chain.invoke.return_value = MagicMock(content="answer")
+    
+    res1 = llm_cache.cached_invoke(chain, {"input": "q"}, "executor")
+    res2 = llm_cache.cached_invoke(chain, {"input": "q"}, "executor")
+    
+    assert res1 == res2 == "answer"
+    assert chain.invoke.call_count == 1
+
+def test_acached_invoke_respects_disabled_flag():
+    chain = MagicMock()
+    chain.ainvoke = AsyncMock(return_value=MagicMock(content="answer"))
+    
+    original = settings.LLM_CACHE_ENABLED
+    settings.LLM_CACHE_ENABLED = False
+    try:
+        asyncio.run(llm_cache.acached_invoke(chain, {"input": "q"}, "coder"))
+        asyncio.run(llm_cache.acached_invoke(chain, {"input": "q"}, "coder"))
+    finally:
+        settings.LLM_CACHE_ENABLED = original
+    
+    assert chain.ainvoke.call_count == 2
+
+def test_acached_invoke_reads_redis_off_the_event_loop():
+    chain = MagicMock()
+    chain.ainvoke = AsyncMock()
+    redis = MagicMock()
+    redis.get.return_value = "cached answer"
+    
+    with patch("app.cache.llm_cache._get_redis", return_value=redis), \
+         patch("app.cache.llm_cache.asyncio.to_thread", wraps=asyncio.to_thread) as to_thread:
+        res = asyncio.run(llm_cache.acached_invoke(chain, {"input": "q"}, "coder"))
+    
+    assert res == "cached answer"
+    to_thread.assert_called_once()
+    assert to_thread.call_args.args[0] is redis.get
+    chain.ainvoke.assert_not_called()
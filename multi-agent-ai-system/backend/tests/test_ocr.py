@@ -0,0 +1,20 @@
+import orjson
+from unittest.mock import patch
+from app.agents.ocr import extract_node
+
+def test_extract_matches_standard_invoice_without_llm():
+    with patch("app.agents.ocr.call_groq_sync") as mock_llm:
+        result = extract_node({"document_text": "Invoice #9000\nSubtotal: $200.00\nTotal: $250.00"})
+
+    mock_llm.assert_not_called()
+    assert result["invoice_number"] == "9000"
+    assert result["total"] == "250.00"
+    assert orjson.loads(result["final_output"]) == {"invoice_number": "9000", "total": "250.00"}
+
+def test_extract_falls_back_to_llm():
+    with patch("app.agents.ocr.call_groq_sync", return_value='```json\n{"invoice_number": "A1", "total": "5.00"}\n```') as mock_llm:
+        result = extract_node({"document_text": "Ref A1, amount payable 5.00"})
+
+    mock_llm.assert_called_once()
+    assert result["invoice_number"] == "A1"
+    assert result["total"] == "5.00"
@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+from unittest.mock import patch
+from app.cache.semantic_cache import SemanticCache
+
+VECTORS = {
+    "explain quantum computing": np.array([1.0, 0.0, 0.0], dtype=np.float32),
+    "break down quantum computing basics": np.array([0.96, 0.28, 0.0], dtype=np.float32),
+    "best pasta recipe": np.array([0.0, 0.0, 1.0], dtype=np.float32),
+}
+
+@pytest.fixture
+def cache():
+    with patch("app.cache.semantic_cache.embed", side_effect=VECTORS.get), \
+         patch("app.cache.semantic_cache._get_redis", return_value=None):
+        yield SemanticCache("test", threshold=0.93, ttl=60)
+
+def test_near_duplicate_hits(cache):
+    value = {"research_data": "Qubits...", "query_complexity": "SIMPLE"}
+    cache.store("explain quantum computing", value)
+
+    assert cache.lookup("break down quantum computing basics") == value
+    assert cache.lookup("best pasta recipe") is None
+
+def test_lookup_misses_without_embeddings():
+    with patch("app.cache.semantic_cache.embed", return_value=None):
+        cache = SemanticCache("test")
+        cache.store("explain quantum computing", {"research_data": "x"})
+        assert cache.lookup("explain quantum computing") is None
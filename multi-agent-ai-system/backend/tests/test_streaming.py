@@ -0,0 +1,27 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+from app.llm import streaming
+
+class FakeChain:
+    def __init__(self, tokens):
+        self.tokens = tokens
+
+    async def astream(self, inputs, config=None):
+        for token in self.tokens:
+            yield SimpleNamespace(content=token)
+
+def test_stream_completion_coalesces_deltas():
+    tokens = ["tok"] * 200
+    with patch.object(streaming, "aget_cached_response", AsyncMock(return_value=None)), \
+         patch.object(streaming, "aset_cached_response", AsyncMock()), \
+         patch.object(streaming, "emit_output_delta") as mock_emit:
+        content = asyncio.run(streaming.stream_completion(
+            FakeChain(tokens), {"q": "x"}, "run-1", "Finalizer", "test"
+        ))
+
+    assert content == "tok" * 200
+    deltas = [c.args[2] for c in mock_emit.call_args_list]
+    # Batched by size (a fast stream never hits the time limit), nothing lost
+    assert "".join(deltas) == content
+    assert len(deltas) < len(tokens) // 10
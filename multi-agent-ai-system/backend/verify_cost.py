@@ -1,6 +1,12 @@
 import logging
+import os
 import uuid
+
+# Per-call rows are checked below, so keep them even if the default is aggregate
+os.environ["COST_PERSIST_MODE"] = "each"
+
 from app.costs.tracker import record_llm_usage, get_cost_summary_by_workflow
+from app.costs.buffer import flush_cost_records
 from app.database import SessionLocal, init_db
 from app.costs.models import CostRecord
 
@@ -28,6 +34,7 @@ def verify_cost_tracking():
     )
     
     # 2. Verify DB record
+    flush_cost_records()
     db = SessionLocal()
     record = db.query(CostRecord).filter(CostRecord.workflow_id == workflow_id).first()
     db.close()
@@ -15,7 +15,7 @@ from langgraph.checkpoint.memory import MemorySaver
 from langgraph.graph import StateGraph, END
 
 # Import app modules
-from app.database import SessionLocal, Base, engine
+from app.database import Base, engine, unpooled_async_session
 from app.hitl.models import ReviewDecision, ReviewStatus, ReviewRequest
 from app.hitl.queue import ReviewQueueService
 from app.hitl.decisions import DecisionService
@@ -50,8 +50,8 @@ async def mock_finalizer_node(state, *args, **kwargs):
 def mock_should_continue_after_research(state):
     return "planner"
 
-def mock_should_continue_after_plan(state):
-    return "executor"
+def mock_should_continue_after_plan(state, allow_fusion=True):
+    return ["executor", "coder"]
 
 def run_hitl_simulation():
     print(">>> Starting HITL Logic-Level Simulation (Mocked Agents)")
@@ -121,17 +121,15 @@ def run_hitl_simulation():
 
         # 5. Create Review Request
         print("4. Creating Review Request via Service...")
-        db = SessionLocal()
-        review_id = None
-        try:
-            with ReviewQueueService(db) as queue:
-                gate = DEFAULT_GATES.get("executor")
-                # Ensure we have a valid gate, if None, create one
-                if not gate:
-                   from app.hitl.gates import ApprovalGate
-                   gate = ApprovalGate(step="executor", risk_level="medium", timeout_minutes=60)
-
-                req = queue.create_review_request(
+        gate = DEFAULT_GATES.get("executor")
+        # Ensure we have a valid gate, if None, create one
+        if not gate:
+           from app.hitl.gates import ApprovalGate
+           gate = ApprovalGate(step="executor", risk_level="medium", timeout_minutes=60)
+
+        async def create_review():
+            async with unpooled_async_session() as db, ReviewQueueService(db) as queue:
+                req = await queue.create_review_request(
                     workflow_id=workflow_id,
                     run_id=run_id,
                     thread_id=thread_id,
@@ -140,29 +138,34 @@ def run_hitl_simulation():
                     snapshot_id=state_snapshot.config['configurable'].get('checkpoint_id'),
                     proposed_action={"description": "Planning complete, ready to execute."}
                 )
-                review_id = req.id
-                print(f"   -> Review Request Created: {review_id}")
-        finally:
-            db.close()
+                return req.id
+
+        review_id = asyncio.run(create_review())
+        print(f"   -> Review Request Created: {review_id}")
 
         # 6. Verify Pending
-        db = SessionLocal()
-        with ReviewQueueService(db) as queue:
-            pending = queue.list_pending_reviews(workflow_id)
-            if not any(r.id == review_id for r in pending):
-                 print("❌ Error: Request not in pending list.")
-                 return
-            print("✅ Verified: Request is pending.")
+        async def list_pending():
+            async with unpooled_async_session() as db, ReviewQueueService(db) as queue:
+                return await queue.list_pending_reviews(workflow_id)
+
+        pending = asyncio.run(list_pending())
+        if not any(r.id == review_id for r in pending):
+             print("❌ Error: Request not in pending list.")
+             return
+        print("✅ Verified: Request is pending.")
         
         # 7. Approve
         print(f"5. Approving Review {review_id}...")
-        with DecisionService(db) as decision_service:
-            decision_service.submit_decision(
-                review_id=review_id,
-                decision=ReviewDecision.APPROVE,
-                actor="test-verifier",
-                reason="Simulation Approval"
-            )
+        async def approve():
+            async with unpooled_async_session() as db, DecisionService(db) as decision_service:
+                await decision_service.submit_decision(
+                    review_id=review_id,
+                    decision=ReviewDecision.APPROVE,
+                    actor="test-verifier",
+                    reason="Simulation Approval"
+                )
+
+        asyncio.run(approve())
         print("✅ Verified: Request approved.")
         
         # 8. Resume